@@ -1,13 +1,257 @@
-from django.contrib import admin
+from itertools import islice
 
-from .models import Category, Comment, Location, Post
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.admin.options import get_content_type_for_model
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.forms.models import BaseInlineFormSet
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .filters import (AuthorFilter, CategoryTitleFilter, LocationNameFilter,
+                      PostFilter, PrefixFilter)
+from .models import Category, Comment, Job, Location, Post, User
+from .moderation import (delete_categories, delete_comments, delete_posts,
+                         move_posts, set_categories_published,
+                         set_posts_published)
+from .search import (COMMENT_FTS_TABLE, FTS_TABLE, fts_match,
+                     match_expression, search_available)
+
+
+class IndexedSearchMixin:
+    """Поиск в списке объектов через полнотекстовые индексы и точное
+    совпадение имени автора (уникальный индекс) вместо icontains по
+    каждому полю из search_fields. fts_lookups - кортежи (поле, таблица
+    индекса, колонка или None). Если полнотекстовых индексов нет (не
+    SQLite), работает стандартный поиск по search_fields. Полное число
+    объектов без фильтра не считается."""
+
+    fts_lookups = ()
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if not search_available():
+            return super().get_search_results(request, queryset, search_term)
+        condition = Q(author__in=User.objects.filter(
+            username=search_term
+        ).values('pk'))
+        expression = match_expression(search_term)
+        if expression:
+            for field, table, column in self.fts_lookups:
+                condition |= Q(**{
+                    f'{field}__in': fts_match(table, expression, column)
+                })
+        return queryset.filter(condition), False
+
+
+class PrefixFilterMixin:
+    """Отдаёт подсказки для фильтров PrefixFilter из list_filter по адресу
+    suggest/<parameter_name>/?term=<начало значения>."""
+
+    @property
+    def media(self):
+        return super().media + forms.Media(js=('js/prefix_filter.js',))
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                'suggest/<str:parameter>/',
+                self.admin_site.admin_view(self.suggest_view),
+                name=f'{opts.app_label}_{opts.model_name}_suggest'
+            ),
+            *super().get_urls(),
+        ]
+
+    def suggest_view(self, request, parameter):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        for list_filter in self.list_filter:
+            if (isinstance(list_filter, type)
+                    and issubclass(list_filter, PrefixFilter)
+                    and list_filter.parameter_name == parameter):
+                return JsonResponse({
+                    'results': list_filter.suggestions(
+                        request.GET.get('term', '').strip()
+                    )
+                })
+        raise Http404
+
+
+class BulkDeleteMixin:
+    """Заменяет стандартное действие «Удалить выбранные». Подтверждение
+    показывает только число удаляемых объектов (без списка всех связанных),
+    а удаление выполняет bulk_delete из blog.moderation одним DELETE на
+    таблицу. cascade - пары (модель, поле связи) удаляемых вместе
+    объектов. Как и стандартное действие, удаление записывается в журнал
+    админки - по записи LogEntry на объект, пачками bulk_create; для
+    текстового представления объектов загружаются только repr_fields."""
+
+    bulk_delete = None
+    cascade = ()
+    repr_fields = ()
+    log_batch_size = 1000
+
+    @admin.action(
+        description='Удалить выбранные %(verbose_name_plural)s',
+        permissions=('delete',)
+    )
+    def delete_selected(self, request, queryset):
+        _, model_count, perms_needed, _ = self.get_deleted_objects(
+            queryset, request
+        )
+        if request.POST.get('post'):
+            if perms_needed:
+                raise PermissionDenied
+            with transaction.atomic():
+                self.log_deletions(request, queryset)
+                deleted = self.bulk_delete(queryset)
+            self.message_user(
+                request,
+                f'Удалено: {deleted} ({self.opts.verbose_name_plural})',
+                messages.SUCCESS
+            )
+            return None
+        select_across = request.POST.get('select_across') == '1'
+        request.current_app = self.admin_site.name
+        return TemplateResponse(
+            request,
+            'admin/blog/bulk_delete_confirmation.html',
+            {
+                **self.admin_site.each_context(request),
+                'title': 'Вы уверены?',
+                'opts': self.opts,
+                'objects_name': self.opts.verbose_name_plural,
+                'model_count': model_count.items(),
+                'perms_lacking': perms_needed,
+                'select_across': select_across,
+                'selected': (
+                    [] if select_across
+                    else request.POST.getlist(helpers.ACTION_CHECKBOX_NAME)
+                ),
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                'media': self.media,
+            }
+        )
+
+    def log_deletions(self, request, queryset):
+        objects = queryset.order_by().select_related(None)
+        if self.repr_fields:
+            objects = objects.only(*self.repr_fields)
+        content_type = get_content_type_for_model(self.model)
+        objects = objects.iterator(chunk_size=self.log_batch_size)
+        while True:
+            entries = [
+                LogEntry(
+                    user_id=request.user.pk,
+                    content_type=content_type,
+                    object_id=str(obj.pk),
+                    object_repr=str(obj)[:200],
+                    action_flag=DELETION,
+                )
+                for obj in islice(objects, self.log_batch_size)
+            ]
+            if not entries:
+                break
+            LogEntry.objects.bulk_create(entries)
+
+    def get_deleted_objects(self, objs, request):
+        if not isinstance(objs, QuerySet):
+            return super().get_deleted_objects(objs, request)
+        selection = objs.order_by().values('pk')
+        counts = {self.model: objs.count()}
+        for model, field in self.cascade:
+            counts[model] = model.objects.filter(
+                **{f'{field}__in': selection}
+            ).count()
+        model_count = {
+            model._meta.verbose_name_plural: count
+            for model, count in counts.items() if count
+        }
+        perms_needed = {
+            model._meta.verbose_name
+            for model, count in counts.items()
+            if count and not request.user.has_perm(
+                f'{model._meta.app_label}.delete_{model._meta.model_name}'
+            )
+        }
+        return [], model_count, perms_needed, []
+
+
+class PostActionForm(helpers.ActionForm):
+    category = forms.ModelChoiceField(
+        Category.objects.all(),
+        required=False,
+        label='Категория'
+    )
+
+
+class CommentPageFormSet(BaseInlineFormSet):
+    """Формы только для одной страницы комментариев публикации."""
+
+    per_page = settings.COMMENTS_PER_PAGE
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, 'page'):
+            self.page = Paginator(
+                super().get_queryset(), self.per_page
+            ).get_page(self.page_number)
+        return self.page.object_list
 
 
 class CommentInline(admin.TabularInline):
+    """Комментарии на странице публикации: по одной странице за раз,
+    текст можно поправить или удалить комментарий, добавлять новые
+    нельзя. Остальные комментарии - в списке CommentAdmin по ссылке."""
+
     model = Comment
+    formset = CommentPageFormSet
+    template = 'admin/blog/comment_inline.html'
+    page_parameter = 'comments_page'
+    fields = (
+        'author',
+        'text',
+        'created_at'
+    )
+    readonly_fields = (
+        'author',
+        'created_at'
+    )
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author', 'post'
+        ).order_by('-created_at', '-pk')
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.page_number = request.GET.get(self.page_parameter, 1)
+        return formset
 
+    def has_add_permission(self, request, obj=None):
+        return False
 
-class CategoryAdmin(admin.ModelAdmin):
+
+class CategoryAdmin(BulkDeleteMixin, PrefixFilterMixin, admin.ModelAdmin):
+    bulk_delete = staticmethod(delete_categories)
+    repr_fields = ('title',)
+    actions = (
+        'publish',
+        'unpublish',
+        'delete_selected',
+    )
     list_display = (
         'id',
         'title',
@@ -20,40 +264,89 @@ class CategoryAdmin(admin.ModelAdmin):
         'is_published',
     )
     list_filter = (
-        'title',
+        CategoryTitleFilter,
     )
 
+    @admin.action(description='Опубликовать', permissions=('change',))
+    def publish(self, request, queryset):
+        updated = set_categories_published(queryset, True)
+        self.message_user(request, f'Опубликовано категорий: {updated}')
+
+    @admin.action(description='Снять с публикации', permissions=('change',))
+    def unpublish(self, request, queryset):
+        updated = set_categories_published(queryset, False)
+        self.message_user(request, f'Снято с публикации категорий: {updated}')
 
-class CommentAdmin(admin.ModelAdmin):
+
+class CommentAdmin(BulkDeleteMixin, PrefixFilterMixin, IndexedSearchMixin,
+                   admin.ModelAdmin):
+    bulk_delete = staticmethod(delete_comments)
+    repr_fields = ('text', 'post')
+    actions = (
+        'delete_selected',
+    )
+    fts_lookups = (
+        ('pk', COMMENT_FTS_TABLE, None),
+        ('post', FTS_TABLE, 'title'),
+    )
+    search_fields = (
+        'text',
+        'post__title',
+        'author__username'
+    )
     list_display = (
         'id',
         'post',
-        'text',
+        'excerpt',
         'author',
         'created_at'
     )
+    list_select_related = (
+        'post',
+        'author'
+    )
     list_filter = (
-        'author',
-        'post'
+        AuthorFilter,
+        PostFilter
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            'post__text', 'post__image_variants'
+        )
 
-class LocationAdmin(admin.ModelAdmin):
+
+class LocationAdmin(PrefixFilterMixin, admin.ModelAdmin):
     list_display = (
         'id',
         'name',
         'created_at'
     )
     list_filter = (
-        'name',
+        LocationNameFilter,
     )
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(BulkDeleteMixin, IndexedSearchMixin, admin.ModelAdmin):
+    bulk_delete = staticmethod(delete_posts)
+    repr_fields = ('title',)
+    cascade = (
+        (Comment, 'post'),
+    )
+    action_form = PostActionForm
+    actions = (
+        'publish',
+        'unpublish',
+        'move_to_category',
+        'delete_selected',
+    )
+    fts_lookups = (
+        ('pk', FTS_TABLE, None),
+    )
     list_display = (
         'id',
         'title',
-        'text',
+        'excerpt',
         'pub_date',
         'author',
         'category',
@@ -68,8 +361,15 @@ class PostAdmin(admin.ModelAdmin):
         'location',
         'is_published'
     )
+    list_select_related = (
+        'author',
+        'category',
+        'location'
+    )
     search_fields = (
         'title',
+        'text',
+        'author__username'
     )
     list_filter = (
         'category',
@@ -78,8 +378,80 @@ class PostAdmin(admin.ModelAdmin):
         CommentInline,
     ]
 
+    @admin.action(description='Опубликовать', permissions=('change',))
+    def publish(self, request, queryset):
+        updated = set_posts_published(queryset, True)
+        self.message_user(request, f'Опубликовано публикаций: {updated}')
+
+    @admin.action(description='Снять с публикации', permissions=('change',))
+    def unpublish(self, request, queryset):
+        updated = set_posts_published(queryset, False)
+        self.message_user(
+            request, f'Снято с публикации публикаций: {updated}'
+        )
+
+    @admin.action(
+        description='Перенести в выбранную категорию',
+        permissions=('change',)
+    )
+    def move_to_category(self, request, queryset):
+        form = self.action_form(request.POST)
+        category = form.cleaned_data['category'] if form.is_valid() else None
+        if category is None:
+            self.message_user(
+                request, 'Выберите категорию для переноса.', messages.WARNING
+            )
+            return
+        updated = move_posts(queryset, category)
+        self.message_user(
+            request, f'Перенесено в «{category}» публикаций: {updated}'
+        )
+
+    def get_changelist_form(self, request, **kwargs):
+        """Форма строки списка, в которой варианты выбора категории
+        и местоположения загружаются один раз на страницу, а не для
+        каждой строки."""
+        form = super().get_changelist_form(request, **kwargs)
+        choices = {}
+
+        class SharedChoicesForm(form):
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                for name in ('category', 'location'):
+                    field = self.fields[name]
+                    if name not in choices:
+                        choices[name] = list(field.choices)
+                    field.choices = choices[name]
+
+        return SharedChoicesForm
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'kind',
+        'status',
+        'attempts',
+        'run_after',
+        'created_at'
+    )
+    list_filter = (
+        'status',
+        'kind'
+    )
+    readonly_fields = (
+        'kind',
+        'payload',
+        'attempts',
+        'error',
+        'locked_at',
+        'created_at'
+    )
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Location, LocationAdmin)
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,342 @@
+"""Read-only JSON API (/api/v1/). Ответы собираются из values_list()
+без создания объектов моделей. Списки разбиваются на страницы
+по курсору (CursorPaginator): сначала выбираются только ключи страницы,
+затем одним запросом - запрошенные поля по их id. Набор полей задаётся
+параметром ?fields=id,title,pub_date, размер страницы - ?limit=."""
+from collections import namedtuple
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views import generic
+
+from .cache import (author_feed, category_feed, index_feed, post_tags,
+                    user_tag)
+from .mixins import ConditionalGetMixin
+from .models import Category, Comment, FeedEntry, Post, User
+from .paginators import CursorPaginator
+from .services import last_update
+
+ApiField = namedtuple('ApiField', ('lookups', 'convert'), defaults=(None,))
+
+
+def _image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field('image').storage.url(name)
+
+
+def _published_location(name, is_published):
+    return name if is_published else None
+
+
+POST_FIELDS = {
+    'id': ApiField(('id',)),
+    'url': ApiField(
+        ('id',), lambda pk: reverse('blog:post_detail', args=(pk,))
+    ),
+    'title': ApiField(('title',)),
+    'excerpt': ApiField(('excerpt',)),
+    'text': ApiField(('text',)),
+    'pub_date': ApiField(('pub_date',)),
+    'updated_at': ApiField(('updated_at',)),
+    'author': ApiField(('author__username',)),
+    'category': ApiField(('category__slug',)),
+    'location': ApiField(
+        ('location__name', 'location__is_published'), _published_location
+    ),
+    'image': ApiField(('image',), _image_url),
+    'comment_count': ApiField(('comment_count',)),
+}
+POST_LIST_FIELDS = (
+    'id', 'url', 'title', 'excerpt', 'pub_date', 'author', 'category',
+    'location', 'image', 'comment_count',
+)
+CATEGORY_FIELDS = {
+    'id': ApiField(('id',)),
+    'slug': ApiField(('slug',)),
+    'title': ApiField(('title',)),
+    'description': ApiField(('description',)),
+    'url': ApiField(
+        ('slug',), lambda slug: reverse('blog:category_posts', args=(slug,))
+    ),
+}
+COMMENT_FIELDS = {
+    'id': ApiField(('id',)),
+    'text': ApiField(('text',)),
+    'created_at': ApiField(('created_at',)),
+    'author': ApiField(('author__username',)),
+}
+
+
+class ApiError(Exception):
+    pass
+
+
+def serialize(queryset, names, spec):
+    """Словари с полями `names` по описанию `spec` для строк выборки."""
+    lookups = list(dict.fromkeys(
+        lookup for name in names for lookup in spec[name].lookups
+    ))
+    items = []
+    for row in queryset.values_list(*lookups):
+        values = dict(zip(lookups, row))
+        item = {}
+        for name in names:
+            field = spec[name]
+            args = [values[lookup] for lookup in field.lookups]
+            item[name] = field.convert(*args) if field.convert else args[0]
+        items.append(item)
+    return items
+
+
+class ApiView(ConditionalGetMixin, generic.View):
+    """Основа представлений API: только чтение, ответы и ошибки в JSON.
+    Свежесть ответов проверяется так же, как у HTML-страниц: get_validators()
+    сначала проверяет параметры запроса (ApiError) и существование
+    объектов (Http404), а затем возвращает метки и время изменения."""
+
+    http_method_names = ('get', 'head', 'options')
+    content_type = 'application/json'
+    fields = POST_FIELDS
+    default_fields = POST_LIST_FIELDS
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404 as error:
+            return self.error(str(error) or 'Не найдено', HTTPStatus.NOT_FOUND)
+        except ApiError as error:
+            return self.error(str(error), HTTPStatus.BAD_REQUEST)
+
+    def get_validators(self):
+        self.get_field_names()
+        return None
+
+    def error(self, message, status):
+        return JsonResponse({'error': message}, status=status)
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(self.get_data())
+
+    def get_field_names(self):
+        value = self.request.GET.get('fields')
+        if not value:
+            return self.default_fields
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+        return list(dict.fromkeys(names))
+
+    def get_data(self):
+        raise NotImplementedError
+
+
+class ApiListView(ApiView):
+    """Список с курсорной пагинацией. get_keys() возвращает выборку, по
+    которой строятся страницы, get_queryset() - выборку, из которой
+    берутся поля найденных на странице id."""
+
+    ordering = ('-pub_date', '-pk')
+
+    def get_keys(self):
+        raise NotImplementedError
+
+    def get_tags(self):
+        return [index_feed()]
+
+    def get_updated_at(self):
+        return last_update()
+
+    def get_validators(self):
+        super().get_validators()
+        self.get_page_size()
+        tags = self.get_tags()
+        # Существует ли страница по курсору, известно только после выборки.
+        if self.request.GET.get('after') or self.request.GET.get('before'):
+            return None
+        return tags, self.get_updated_at()
+
+    def get_queryset(self):
+        return Post.objects.all()
+
+    def get_page_size(self):
+        try:
+            limit = int(self.request.GET.get('limit', settings.API_PAGE_SIZE))
+        except ValueError:
+            raise ApiError('Параметр limit должен быть числом')
+        return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+    def get_data(self):
+        names = self.get_field_names()
+        keys = self.get_keys()
+        key = keys.model._meta.pk.name
+        paginator = CursorPaginator(
+            keys.values(key, self.ordering[0].lstrip('-')),
+            self.get_page_size(),
+            ordering=self.ordering
+        )
+        try:
+            page = paginator.page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before')
+            )
+        except InvalidPage as error:
+            raise ApiError(str(error))
+        ids = [item[key] for item in page]
+        items = {
+            item['id']: item for item in serialize(
+                self.get_queryset().filter(pk__in=ids),
+                ('id', *(name for name in names if name != 'id')),
+                self.fields
+            )
+        }
+        results = []
+        for pk in ids:
+            if pk in items:
+                if 'id' not in names:
+                    del items[pk]['id']
+                results.append(items[pk])
+        return {
+            'results': results,
+            'next': self.page_url('after', page.next_cursor),
+            'previous': self.page_url('before', page.previous_cursor),
+        }
+
+    def page_url(self, direction, cursor):
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[direction] = cursor
+        return f'{self.request.path}?{query.urlencode()}'
+
+
+class PostListView(ApiListView):
+    """Лента видимых публикаций, как на главной странице."""
+
+    def get_keys(self):
+        return FeedEntry.objects.all()
+
+
+class CategoryPostListView(ApiListView):
+
+    def get_category(self):
+        if not hasattr(self, 'category'):
+            self.category = get_object_or_404(
+                Category,
+                slug=self.kwargs['category_slug'],
+                is_published=True
+            )
+        return self.category
+
+    def get_tags(self):
+        return [category_feed(self.get_category().pk)]
+
+    def get_keys(self):
+        return FeedEntry.objects.filter(category=self.get_category())
+
+
+class ProfilePostListView(ApiListView):
+    """Публикации автора; сам автор видит и скрытые, как в профиле."""
+
+    def get_profile(self):
+        if not hasattr(self, 'profile'):
+            self.profile = get_object_or_404(
+                User, username=self.kwargs['username']
+            )
+            self.own = self.request.user.id == self.profile.pk
+        return self.profile
+
+    def get_tags(self):
+        profile = self.get_profile()
+        return [
+            user_tag(profile.pk),
+            author_feed(profile.pk, own=self.own),
+        ]
+
+    def get_keys(self):
+        profile = self.get_profile()
+        if self.own:
+            return Post.objects.filter(author=profile)
+        return FeedEntry.objects.filter(author=profile)
+
+
+class CategoryListView(ApiListView):
+    fields = CATEGORY_FIELDS
+    default_fields = tuple(CATEGORY_FIELDS)
+    ordering = ('title', 'pk')
+
+    def get_keys(self):
+        return Category.objects.filter(is_published=True)
+
+    def get_queryset(self):
+        return Category.objects.all()
+
+
+def visible_posts(request):
+    """Публикации, которые видит пользователь на странице публикации."""
+    return Post.objects.filter(
+        Q(is_visible=True) | Q(author_id=request.user.id)
+    )
+
+
+class VisiblePostMixin:
+    """Видимая пользователю публикация из URL (одна выборка за запрос)
+    и её метки и время изменения для проверки свежести."""
+
+    def get_post(self):
+        if not hasattr(self, 'post'):
+            self.post = get_object_or_404(
+                visible_posts(self.request).select_related('category').only(
+                    'author_id', 'category_id', 'location_id', 'updated_at',
+                    'category__updated_at'
+                ),
+                pk=self.kwargs['post_id']
+            )
+        return self.post
+
+    def get_tags(self):
+        return post_tags(self.get_post())
+
+    def get_updated_at(self):
+        post = self.get_post()
+        if post.category is None:
+            return post.updated_at
+        return max(post.updated_at, post.category.updated_at)
+
+
+class CommentListView(VisiblePostMixin, ApiListView):
+    fields = COMMENT_FIELDS
+    default_fields = tuple(COMMENT_FIELDS)
+    ordering = ('created_at', 'pk')
+
+    def get_keys(self):
+        return Comment.objects.filter(post_id=self.get_post().pk)
+
+    def get_queryset(self):
+        return Comment.objects.all()
+
+
+class PostDetailView(VisiblePostMixin, ApiView):
+    default_fields = (*POST_LIST_FIELDS, 'text', 'updated_at')
+
+    def get_validators(self):
+        super().get_validators()
+        return self.get_tags(), self.get_updated_at()
+
+    def get_data(self):
+        items = serialize(
+            visible_posts(self.request).filter(pk=self.kwargs['post_id']),
+            self.get_field_names(),
+            self.fields
+        )
+        if not items:
+            raise Http404('Публикация не найдена')
+        return items[0]
@@ -0,0 +1,123 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+FEED_COUNT_KEY = 'blog:count:{}'
+PAGE_KEY = 'blog:page:{}'
+TAG_KEY = 'blog:tag:{}'
+
+
+def index_feed():
+    return 'index'
+
+
+def category_feed(category_id):
+    return f'category:{category_id}'
+
+
+def author_feed(author_id, own=False):
+    return f'author:{author_id}:own' if own else f'author:{author_id}'
+
+
+def post_tag(post_id):
+    return f'post:{post_id}'
+
+
+def location_tag(location_id):
+    return f'location:{location_id}'
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+def post_tags(post):
+    """Метки, от которых зависит отображение публикации: сама публикация,
+    её категория, местоположение и данные автора."""
+    tags = [post_tag(post.pk), user_tag(post.author_id)]
+    if post.category_id:
+        tags.append(category_feed(post.category_id))
+    if post.location_id:
+        tags.append(location_tag(post.location_id))
+    return tags
+
+
+def set_card_versions(posts):
+    """Проставляет публикациям версию карточки для кеша фрагментов.
+    Версия меняется при изменении публикации, её категории, местоположения,
+    автора или числа комментариев, в том числе из других процессов
+    (обработчика задач, импорта), поэтому метки хранятся в общем кеше."""
+    posts = list(posts)
+    versions = get_tag_versions(
+        tag for post in posts for tag in post_tags(post)
+    )
+    for post in posts:
+        post.card_version = '-'.join(
+            str(versions[tag]) for tag in post_tags(post)
+        )
+
+
+def feed_count_key(feed):
+    return FEED_COUNT_KEY.format(feed)
+
+
+def get_tag_versions(tags, default=None):
+    """Текущие версии меток. Отсутствующие в кеше метки получают версию
+    `default` (по умолчанию - текущее время)."""
+    keys = {tag: TAG_KEY.format(tag) for tag in set(tags)}
+    found = cache.get_many(keys.values())
+    missing = {
+        key: default or time.time_ns()
+        for key in keys.values() if key not in found
+    }
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {tag: found[key] for tag, key in keys.items()}
+
+
+def invalidate(*tags):
+    """Сбрасывает всё, что зависит от меток: кешированные страницы (через
+    новую версию метки) и счётчики лент."""
+    tags = set(tags)
+    version = time.time_ns()
+    cache.set_many({TAG_KEY.format(tag): version for tag in tags}, None)
+    cache.delete_many([feed_count_key(tag) for tag in tags])
+
+
+def page_key(path):
+    return PAGE_KEY.format(hashlib.md5(path.encode()).hexdigest())
+
+
+def get_cached_page(path):
+    """Страница из кеша, если ни одна из её меток не менялась после
+    сохранения."""
+    entry = cache.get(page_key(path))
+    if entry is None:
+        return None
+    current = cache.get_many([TAG_KEY.format(tag) for tag in entry['tags']])
+    for tag, version in entry['tags'].items():
+        if current.get(TAG_KEY.format(tag)) != version:
+            return None
+    return entry
+
+
+def set_cached_page(path, response, tags, started, validators=None):
+    """Сохраняет страницу вместе с версиями её меток и, если они есть,
+    значениями ETag и Last-Modified. Если какая-то метка изменилась во
+    время формирования страницы, страница не кешируется."""
+    versions = get_tag_versions(tags, default=started)
+    if any(version > started for version in versions.values()):
+        return
+    cache.set(
+        page_key(path),
+        {
+            'tags': versions,
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'validators': validators,
+        },
+        settings.PAGE_CACHE_TIMEOUT
+    )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Сброс кеша по меткам должен доходить до всех процессов: сайта,
+    планировщика, обработчика задач и команд импорта."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend != PROCESS_LOCAL_CACHE:
+        return []
+    return [Warning(
+        'Кеш по умолчанию не общий для процессов: страницы и карточки '
+        'не сбрасываются после publish_scheduled, run_jobs и импорта.',
+        hint='Укажите в CACHES общий кеш (файловый, memcached, Redis '
+             'или в базе данных).',
+        obj=backend,
+        id='blog.W001',
+    )]
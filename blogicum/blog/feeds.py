@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .cache import author_feed, category_feed, index_feed, post_tags
+from .models import Category, FeedEntry, Post, User
+
+SITE_TITLE = 'Блогикум'
+
+
+class PostFeed(Feed):
+    """Лента RSS/Atom последних видимых публикаций. Публикации выбираются
+    по материализованной ленте, как в SetMixin, и подгружаются по id без
+    полного текста: описанием служит сохранённое начало текста."""
+
+    description = 'Новые публикации'
+
+    def get_object(self, request, *args, **kwargs):
+        return None
+
+    def title(self, obj):
+        return SITE_TITLE
+
+    def link(self, obj):
+        return reverse('blog:index')
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+    def get_entries(self, obj):
+        return FeedEntry.objects.all()
+
+    def get_feed_tag(self, obj):
+        return index_feed()
+
+    def items(self, obj):
+        ids = list(
+            self.get_entries(obj).order_by('-pub_date', '-post').values_list(
+                'pk', flat=True
+            )[:settings.FEED_ITEMS]
+        )
+        posts = Post.objects.select_related('author', 'category').only(
+            'title', 'excerpt', 'pub_date', 'updated_at', 'author_id',
+            'category_id', 'location_id', 'author__username',
+            'category__title'
+        ).in_bulk(ids)
+        self.posts = [posts[pk] for pk in ids if pk in posts]
+        return self.posts
+
+    def get_cache_tags(self):
+        """Метки кеша ленты: сама лента и все её публикации."""
+        tags = [self.get_feed_tag(self.object)]
+        for post in self.posts:
+            tags.extend(post_tags(post))
+        return tags
+
+    def get_feed(self, obj, request):
+        self.object = obj
+        return super().get_feed(obj, request)
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_author_name(self, item):
+        return item.author.get_username()
+
+    def item_author_link(self, item):
+        return reverse('blog:profile', args=(item.author.get_username(),))
+
+    def item_categories(self, item):
+        return (item.category.title,) if item.category else ()
+
+
+class CategoryPostFeed(PostFeed):
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category, slug=category_slug, is_published=True
+        )
+
+    def title(self, obj):
+        return f'{SITE_TITLE}: {obj.title}'
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=(obj.slug,))
+
+    def description(self, obj):
+        return obj.description
+
+    def get_entries(self, obj):
+        return FeedEntry.objects.filter(category=obj)
+
+    def get_feed_tag(self, obj):
+        return category_feed(obj.pk)
+
+
+class ProfilePostFeed(PostFeed):
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'{SITE_TITLE}: {obj.get_full_name() or obj.get_username()}'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=(obj.get_username(),))
+
+    def description(self, obj):
+        return f'Публикации пользователя {obj.get_username()}'
+
+    def get_entries(self, obj):
+        return FeedEntry.objects.filter(author=obj)
+
+    def get_feed_tag(self, obj):
+        return author_feed(obj.pk)
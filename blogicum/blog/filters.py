@@ -0,0 +1,108 @@
+from django.contrib import admin
+from django.db.models import Q
+from django.urls import reverse
+
+from .models import Category, Location, Post, User
+
+# Верхняя граница для диапазона строк с заданным префиксом.
+PREFIX_END = '\U0010ffff'
+
+
+def prefix_range(field, prefix):
+    """Условие «поле начинается с prefix» в виде диапазона: в отличие
+    от LIKE такой запрос всегда идёт по индексу поля. Регистр учитывается.
+    """
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END})
+
+
+class PrefixFilter(admin.SimpleListFilter):
+    """Фильтр списка в админке по началу значения поля `field` модели
+    `model` с подсказками при вводе. Если задан `path`, фильтруется
+    связанная модель: path__in=<подзапрос>. Вместо списка всех значений
+    фильтр выводит поле ввода, а подсказки (не больше `limit`) отдаёт
+    PrefixFilterMixin.suggest_view."""
+
+    template = 'admin/blog/prefix_filter.html'
+    model = None
+    field = None
+    path = None
+    limit = 10
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        condition = prefix_range(self.field, value)
+        if self.path is None:
+            return queryset.filter(condition)
+        return queryset.filter(**{
+            f'{self.path}__in': self.model.objects.filter(
+                condition
+            ).values('pk')
+        })
+
+    def choices(self, changelist):
+        opts = changelist.opts
+        yield {
+            'value': self.value() or '',
+            'hidden': [
+                (name, value) for name, value in changelist.params.items()
+                if name not in (self.parameter_name, 'p')
+            ],
+            'clear_url': changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+            'suggest_url': reverse(
+                f'{changelist.model_admin.admin_site.name}:'
+                f'{opts.app_label}_{opts.model_name}_suggest',
+                args=(self.parameter_name,)
+            ),
+        }
+
+    @classmethod
+    def suggestions(cls, prefix):
+        if not prefix:
+            return []
+        return list(
+            cls.model.objects.filter(
+                prefix_range(cls.field, prefix)
+            ).order_by(cls.field).values_list(
+                cls.field, flat=True
+            ).distinct()[:cls.limit]
+        )
+
+
+class AuthorFilter(PrefixFilter):
+    title = 'автору'
+    parameter_name = 'author'
+    model = User
+    field = 'username'
+    path = 'author'
+
+
+class PostFilter(PrefixFilter):
+    title = 'публикации'
+    parameter_name = 'post'
+    model = Post
+    field = 'title'
+    path = 'post'
+
+
+class CategoryTitleFilter(PrefixFilter):
+    title = 'заголовку'
+    parameter_name = 'title'
+    model = Category
+    field = 'title'
+
+
+class LocationNameFilter(PrefixFilter):
+    title = 'названию места'
+    parameter_name = 'name'
+    model = Location
+    field = 'name'
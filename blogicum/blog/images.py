@@ -0,0 +1,80 @@
+import os
+from dataclasses import dataclass
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+SCALES = (1, 2)
+
+
+@dataclass
+class ResponsiveImage:
+    src: str
+    srcset: str
+    width: int
+    height: int
+
+
+def generate_variants(image):
+    """Создаёт уменьшенные копии изображения публикации для каждого вида
+    из POST_IMAGE_WIDTHS (в обычной и двойной плотности) и возвращает
+    описание для поля Post.image_variants. Если файл не удаётся прочитать
+    как изображение, возвращает пустой словарь."""
+    try:
+        with image.open('rb') as file, Image.open(file) as original:
+            original = ImageOps.exif_transpose(original)
+            original.load()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return {}
+    has_alpha = original.mode in ('RGBA', 'LA', 'P')
+    extension = '.png' if has_alpha else '.jpg'
+    if not has_alpha:
+        original = original.convert('RGB')
+    base = os.path.splitext(image.name)[0]
+    variants = {}
+    for kind, width in settings.POST_IMAGE_WIDTHS.items():
+        variants[kind] = []
+        for scale in SCALES:
+            target = min(width * scale, original.width)
+            if variants[kind] and target <= variants[kind][-1]['width']:
+                break
+            resized = original.copy()
+            resized.thumbnail((target, original.height * target))
+            buffer = BytesIO()
+            if has_alpha:
+                resized.save(buffer, 'PNG', optimize=True)
+            else:
+                resized.save(buffer, 'JPEG', quality=85, optimize=True)
+            name = image.storage.save(
+                f'{base}_{kind}_{resized.width}w{extension}',
+                ContentFile(buffer.getvalue())
+            )
+            variants[kind].append({
+                'name': name,
+                'width': resized.width,
+                'height': resized.height,
+            })
+    return {
+        'width': original.width,
+        'height': original.height,
+        'variants': variants,
+    }
+
+
+def responsive_image(image, variants, kind):
+    """Данные для тега <img> с srcset по сохранённым вариантам; None, если
+    вариантов нет."""
+    sizes = variants.get('variants', {}).get(kind)
+    if not sizes:
+        return None
+    return ResponsiveImage(
+        src=image.storage.url(sizes[0]['name']),
+        srcset=', '.join(
+            f"{image.storage.url(size['name'])} {size['width']}w"
+            for size in sizes
+        ),
+        width=sizes[0]['width'],
+        height=sizes[0]['height'],
+    )
@@ -0,0 +1,173 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import invalidate, post_tag
+from .images import generate_variants
+from .models import Job, Post
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+STALE_ERROR = 'Обработчик не завершил задачу за JOB_LOCK_TIMEOUT.'
+
+
+def handler(kind):
+    """Регистрирует функцию как обработчик задач вида `kind`."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, **payload):
+    if kind not in HANDLERS:
+        raise ValueError(f'Неизвестный вид задачи: {kind}')
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def enqueue_image_variants(batch_size=1000):
+    """Ставит в очередь построение уменьшенных копий для публикаций с фото,
+    у которых копий нет и задачи в очереди тоже нет (например, после
+    импорта: bulk_create не вызывает сигналов). Публикации помечаются
+    ожидающими обработки, пачки по batch_size - в своей транзакции.
+    Возвращает число поставленных задач."""
+    queued = 0
+    last_id = 0
+    while True:
+        posts = list(
+            Post.objects.exclude(image='').exclude(
+                image_variants__has_key='variants'
+            ).filter(pk__gt=last_id).order_by('pk').values_list(
+                'pk', 'image'
+            )[:batch_size]
+        )
+        if not posts:
+            break
+        last_id = posts[-1][0]
+        waiting = {
+            payload.get('post_id') for payload in Job.objects.filter(
+                kind='post_image_variants',
+                status__in=(Job.PENDING, Job.RUNNING),
+                payload__post_id__in=[pk for pk, _ in posts]
+            ).values_list('payload', flat=True)
+        }
+        posts = [(pk, image) for pk, image in posts if pk not in waiting]
+        if not posts:
+            continue
+        with transaction.atomic():
+            Post.objects.filter(pk__in=[pk for pk, _ in posts]).update(
+                image_variants={'pending': True}
+            )
+            Job.objects.bulk_create(
+                Job(
+                    kind='post_image_variants',
+                    payload={'post_id': pk, 'image': image}
+                )
+                for pk, image in posts
+            )
+        invalidate(*(post_tag(pk) for pk, _ in posts))
+        queued += len(posts)
+    return queued
+
+
+def claim_jobs(limit):
+    """Забирает в работу до `limit` готовых к выполнению задач. Задача
+    достаётся только тому обработчику, чей условный UPDATE её изменил,
+    поэтому несколько обработчиков могут работать одновременно.
+    Задачи, зависшие дольше JOB_LOCK_TIMEOUT (например, обработчик упал
+    вместе с процессом), считаются неудачной попыткой: они возвращаются
+    в очередь, а после JOB_MAX_ATTEMPTS попыток помечаются ошибкой."""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    )
+    stale.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS - 1).update(
+        status=Job.FAILED, attempts=F('attempts') + 1, error=STALE_ERROR
+    )
+    stale.update(
+        status=Job.PENDING, attempts=F('attempts') + 1, error=STALE_ERROR
+    )
+    candidates = Job.objects.filter(
+        status=Job.PENDING,
+        run_after__lte=now
+    ).order_by('run_after', 'id').values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in candidates:
+        if Job.objects.filter(pk=pk, status=Job.PENDING).update(
+            status=Job.RUNNING, locked_at=now
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def run_job(pk):
+    """Выполняет взятую в работу задачу. Возвращает False, если обработчик
+    завершился с ошибкой."""
+    job = Job.objects.get(pk=pk)
+    try:
+        HANDLERS[job.kind](**job.payload)
+    except Exception:
+        fail_job(job, traceback.format_exc())
+        return False
+    job.status = Job.DONE
+    job.error = ''
+    job.save(update_fields=('status', 'error'))
+    return True
+
+
+def run_job_in_worker(pk):
+    """run_job для потока или процесса пула: у каждого из них своё
+    соединение с БД, которое закрывается после задачи."""
+    close_old_connections()
+    try:
+        return run_job(pk)
+    finally:
+        connections.close_all()
+
+
+def fail_job(job, error):
+    logger.warning('Задача %s завершилась с ошибкой:\n%s', job, error)
+    job.attempts += 1
+    job.error = error
+    if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+        job.status = Job.FAILED
+    else:
+        job.status = Job.PENDING
+        job.run_after = timezone.now() + timedelta(
+            seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        )
+    job.save(update_fields=('attempts', 'error', 'status', 'run_after'))
+
+
+def run_pending_jobs(limit=None):
+    """Выполняет готовые задачи в текущем потоке; удобно для тестов и
+    разовых запусков. Возвращает число выполненных задач."""
+    done = 0
+    while limit is None or done < limit:
+        claimed = claim_jobs(1)
+        if not claimed:
+            break
+        run_job(claimed[0])
+        done += 1
+    return done
+
+
+@handler('post_image_variants')
+def process_post_image(post_id, image):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or post.image.name != image:
+        return
+    variants = generate_variants(post.image)
+    # Пока строились копии, публикацию могли изменить: записывается
+    # только image_variants, и только если фото осталось тем же.
+    if Post.objects.filter(pk=post_id, image=image).update(
+        image_variants=variants, updated_at=timezone.now()
+    ):
+        invalidate(post_tag(post_id))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from blog.transfer import (FORMATS, NDJSON, ProgressReport, export_records,
+                           guess_format, open_dump, write_records)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, категории, местоположения, публикации '
+        'и комментарии в формате db.json или NDJSON (по объекту на '
+        'строку). Таблицы читаются диапазонами id, записи пишутся по '
+        'одной, поэтому память не зависит от объёма данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            default='-',
+            help='Файл дампа (.json, .ndjson, можно .gz) или - для stdout.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help=(
+                'Формат дампа; по умолчанию определяется по расширению, '
+                'в stdout пишется NDJSON.'
+            )
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Сколько строк читать одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        format = options['format'] or (
+            NDJSON if output == '-' else guess_format(output)
+        )
+        records = export_records(
+            batch_size=options['batch_size'],
+            progress=ProgressReport(self.stderr)
+        )
+        with open_dump(output, 'w') as file:
+            count = write_records(file, records, format)
+        self.stderr.write(self.style.SUCCESS(f'Выгружено записей: {count}'))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.services import next_scheduled, publish_scheduled
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает в лентах отложенные публикации, время которых '
+        'наступило. С --loop работает постоянно и просыпается к времени '
+        'ближайшей публикации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать следующих публикаций.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help=(
+                'Максимальная пауза между проверками в секундах: '
+                'так подхватываются публикации, созданные во время ожидания.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = publish_scheduled()
+            if published:
+                self.stdout.write(f'Опубликовано: {published}')
+            if not options['loop']:
+                return
+            time.sleep(self.get_delay(options['interval']))
+
+    def get_delay(self, interval):
+        upcoming = next_scheduled()
+        if upcoming is None:
+            return interval
+        delay = (upcoming - timezone.now()).total_seconds()
+        return min(max(delay, 0), interval)
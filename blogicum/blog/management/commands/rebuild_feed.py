@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog.services import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованную ленту видимых публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько публикаций обрабатывать в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_feed(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Записей в ленте: {total}')
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает полнотекстовые индексы публикаций и комментариев.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько записей индексировать в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано записей: {total}')
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog.services import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики комментариев публикаций с фактическими.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько публикаций проверять в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        updated = recount_comments(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {updated}')
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from blog.services import rehash_post_images
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит фото публикаций, загруженные до перехода на хранилище '
+        'с именами по хешу содержимого, в новые имена.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько публикаций обрабатывать в одной транзакции.'
+        )
+        parser.add_argument(
+            '--delete-originals',
+            action='store_true',
+            help=(
+                'Удалять старые файлы, на которые больше не ссылается '
+                'ни одна публикация.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        moved = rehash_post_images(
+            batch_size=options['batch_size'],
+            delete_originals=options['delete_originals']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено публикаций: {moved}')
+        )
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.jobs import claim_jobs, run_job_in_worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди (например, обработку '
+        'изображений публикаций) в пуле потоков или процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.JOB_WORKERS,
+            help='Число одновременно выполняемых задач.'
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help=(
+                'Выполнять задачи в отдельных процессах, а не потоках: '
+                'обработка изображений не упирается в GIL.'
+            )
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        if options['processes']:
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        done = failed = 0
+        with executor:
+            while True:
+                claimed = claim_jobs(workers)
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                if options['processes']:
+                    connections.close_all()
+                for result in executor.map(run_job_in_worker, claimed):
+                    if result:
+                        done += 1
+                    else:
+                        failed += 1
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
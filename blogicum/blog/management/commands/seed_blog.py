@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.seeding import SEED_PASSWORD, BlogSeeder
+from blog.transfer import ProgressReport, finish_import
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, категориями, '
+        'местоположениями, публикациями и комментариями для нагрузочных '
+        'проверок. Распределения неравномерные (популярные авторы, '
+        'вирусные публикации, отложенные публикации, скрытые категории), '
+        'результат определяется --seed. Пароль всех пользователей: '
+        f'{SEED_PASSWORD}.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ('users', 1000),
+            ('categories', 20),
+            ('locations', 100),
+            ('posts', 10000),
+            ('comments', 100000),
+        ):
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                default=default,
+                help=f'Сколько создать ({default} по умолчанию).'
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора случайных чисел.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько строк вставлять одним запросом.'
+        )
+        parser.add_argument(
+            '--keep-indexes',
+            action='store_true',
+            help='Не удалять вторичные индексы таблиц на время вставки.'
+        )
+        parser.add_argument(
+            '--skip-search-index',
+            action='store_true',
+            help=(
+                'Не строить полнотекстовый индекс (его можно собрать позже '
+                'командой rebuild_search_index).'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not (options['users']
+                                     and options['categories']):
+            raise CommandError(
+                'Для публикаций нужны хотя бы один пользователь '
+                'и одна категория.'
+            )
+        started = time.monotonic()
+        seeder = BlogSeeder(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=ProgressReport(self.stdout)
+        )
+        stats = seeder.run(
+            users=options['users'],
+            categories=options['categories'],
+            locations=options['locations'],
+            posts=options['posts'],
+            comments=options['comments'],
+            defer_indexes=not options['keep_indexes']
+        )
+        self.stdout.write(
+            f'Создано записей: {stats.total}, {stats.rate():.0f} записей/с. '
+            'Пересчёт лент и индексов...'
+        )
+        finish_import(
+            stats,
+            batch_size=options['batch_size'],
+            search_index=not options['skip_search_index']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.0f} с.'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Размеры оригинала и файлы уменьшенных копий.', verbose_name='Уменьшенные копии фото'),
+        ),
+    ]
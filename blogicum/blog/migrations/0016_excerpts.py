@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-18 11:57
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 256
+
+
+def fill_excerpts(apps, schema_editor):
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('blog', name)
+        last_id = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_id).order_by('pk').only(
+                    'pk', 'text'
+                )[:1000]
+            )
+            if not batch:
+                break
+            for obj in batch:
+                obj.excerpt = Truncator(
+                    ' '.join(obj.text.split())
+                ).chars(EXCERPT_LENGTH)
+            model.objects.bulk_update(batch, ('excerpt',))
+            last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_prefix_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=256, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=256, verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -1,29 +1,226 @@
+import hashlib
+import time
+from http import HTTPStatus
+
 from django.conf import settings
-from django.db import models
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse, QueryDict
 from django.shortcuts import redirect
-from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
+from .cache import (get_cached_page, get_tag_versions, index_feed, post_tags,
+                    set_cached_page, set_card_versions)
 from .forms import PostForm
-from .models import Comment, Post
+from .models import Comment, FeedEntry, Post
+from .paginators import CachedCountPaginator, CursorPaginator
+
+
+class PageCacheMixin:
+    """Кеширует готовые страницы для анонимных GET-запросов. Страница
+    перестаёт считаться актуальной, как только меняется любая из меток,
+    которые вернул метод представления get_cache_tags(context). Ключ
+    кеша строится из пути и только тех параметров запроса, которые
+    читает представление (cache_params), поэтому произвольные параметры
+    не плодят записи в кеше."""
+
+    def get_cache_path(self):
+        query = QueryDict(mutable=True)
+        for name in sorted(getattr(self, 'cache_params', ())):
+            values = self.request.GET.getlist(name)
+            if values:
+                query.setlist(name, values[-1:])
+        query = query.urlencode()
+        return f'{self.request.path}?{query}' if query else self.request.path
+
+    def get_page_entry(self):
+        """Актуальная запись кеша для текущего запроса или None. Кеш
+        читается один раз за запрос; с этого момента отсчитываются
+        изменения, при которых страница не сохраняется в кеш."""
+        if not hasattr(self, '_page_entry'):
+            request = self.request
+            self._started = time.time_ns()
+            self._page_entry = None
+            if (request.method in ('GET', 'HEAD')
+                    and not request.user.is_authenticated):
+                self._page_entry = get_cached_page(self.get_cache_path())
+        return self._page_entry
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        path = self.get_cache_path()
+        entry = self.get_page_entry()
+        if entry is not None:
+            return HttpResponse(
+                entry['content'], content_type=entry['content_type']
+            )
+        started = self._started
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != HTTPStatus.OK:
+            return response
+
+        def cache_page(rendered):
+            set_cached_page(
+                path,
+                rendered,
+                self.get_cache_tags(getattr(rendered, 'context_data', None)),
+                started,
+                getattr(self, 'response_validators', None)
+            )
+
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(cache_page)
+        else:
+            cache_page(response)
+        return response
+
+
+class ConditionalGetMixin:
+    """Отвечает на условные GET- и HEAD-запросы (If-None-Match,
+    If-Modified-Since) кодом 304 до выборки публикаций и рендеринга
+    шаблона, а на HEAD-запросы - одними заголовками. Свежесть страницы
+    определяет метод представления get_validators(): метки кеша и время
+    последнего изменения данных страницы. Он же проверяет, что страница
+    существует (Http404 для отсутствующих объектов), а если этого не
+    узнать без выборки (например, для дальних страниц ленты), возвращает
+    None, и запрос обрабатывается обычным образом. ETag строится из
+    версий меток, которые меняются и при удалениях, а Last-Modified -
+    из наибольшего из времён изменения и версий меток. Если страница есть
+    в кеше PageCacheMixin, берутся заголовки, сохранённые вместе с ней,
+    без запросов к базе данных."""
+
+    def get_validators(self):
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        self.response_validators = self.get_response_validators()
+        if self.response_validators is None:
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.response_validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None and request.method == 'HEAD':
+            response = HttpResponse(
+                content_type=getattr(self, 'content_type', None)
+            )
+        elif response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_response_validators(self):
+        """ETag и время Last-Modified (в секундах) для текущего запроса."""
+        entry = getattr(self, 'get_page_entry', lambda: None)()
+        if entry is not None and entry.get('validators'):
+            return entry['validators']
+        validators = self.get_validators()
+        if validators is None:
+            return None
+        tags, updated_at = validators
+        versions = get_tag_versions(tags)
+        etag = quote_etag(hashlib.md5(repr((
+            sorted(versions.items()), updated_at, self.request.user.id,
+            getattr(self, 'content_type', None)
+        )).encode()).hexdigest())
+        last_modified = int(max(
+            updated_at.timestamp() if updated_at else 0,
+            *(version / 10 ** 9 for version in versions.values())
+        ))
+        return etag, last_modified
 
 
 class SetMixin:
     model = Post
     paginate_by = settings.LIMIT_MIN
+    paginator_class = CachedCountPaginator
+    cache_params = ('page', 'after', 'before')
+
+    context_object_name = 'post_list'
 
     def get_queryset(self):
-        return Post.objects.select_related(
+        return FeedEntry.objects.order_by('-pub_date', '-post')
+
+    def get_feed(self):
+        return index_feed()
+
+    def is_first_page(self):
+        """Первая страница ленты есть всегда, даже у пустой ленты;
+        существование остальных не проверить без выборки."""
+        query = self.request.GET
+        return (
+            query.get(self.page_kwarg, '1') in ('', '1')
+            and not query.get('after') and not query.get('before')
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        set_card_versions(context['page_obj'])
+        context['card_cache_timeout'] = settings.CARD_CACHE_TIMEOUT
+        return context
+
+    def get_cache_tags(self, context):
+        tags = [self.get_feed()]
+        for post in context['page_obj']:
+            tags.extend(post_tags(post))
+        return tags
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, feed=self.get_feed(), **kwargs
+        )
+
+    def uses_cursor(self):
+        return settings.CURSOR_PAGINATION
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.uses_cursor():
+            paginator = CursorPaginator(queryset, page_size)
+            try:
+                page = paginator.page(
+                    after=self.request.GET.get('after'),
+                    before=self.request.GET.get('before')
+                )
+            except InvalidPage as error:
+                raise Http404(str(error))
+        else:
+            paginator, page, _, _ = super().paginate_queryset(
+                queryset, page_size
+            )
+        page.object_list = self.hydrate(page.object_list)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def hydrate(self, object_list):
+        """Подгружает публикации для записей ленты одной страницы,
+        сохраняя порядок ленты."""
+        entries = list(object_list)
+        if not entries or not isinstance(entries[0], FeedEntry):
+            return entries
+        posts = Post.objects.select_related(
             'category', 'author', 'location'
-        ).filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        ).annotate(
-            comment_count=models.Count('comments')
-        ).order_by('-pub_date')
+        ).in_bulk([entry.pk for entry in entries])
+        return [posts[entry.pk] for entry in entries if entry.pk in posts]
+
+
+class ObjectCacheMixin:
+    """Запоминает объект, полученный get_object(), на время запроса:
+    проверка авторства и сам UpdateView/DeleteView используют одну
+    выборку."""
 
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
 
-class PostMixin:
+
+class PostMixin(ObjectCacheMixin):
     model = Post
     form_class = PostForm
     template_name = 'blog/create_post.html'
@@ -33,12 +230,15 @@ class PostMixin:
 class AuthorMixin:
 
     def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
+        if self.get_object().author_id != request.user.id:
             return redirect('blog:post_detail', post_id=self.kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
 
 
-class CommentMixin:
+class CommentMixin(ObjectCacheMixin):
     model = Comment
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_id'
+
+    def get_queryset(self):
+        return Comment.objects.filter(post_id=self.kwargs['post_id'])
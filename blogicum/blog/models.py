@@ -1,9 +1,26 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DEFERRED
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .images import responsive_image
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
+# Поля, от которых зависит видимость публикации (Post.should_be_visible).
+VISIBILITY_FIELDS = frozenset(
+    ('is_published', 'pub_date', 'category', 'category_id', 'is_visible')
+)
+
+
+def make_excerpt(text):
+    """Начало текста в одну строку для списков, где полный текст
+    не нужен."""
+    return Truncator(' '.join(text.split())).chars(settings.LIMIT_MAX)
+
 
 class BaseModel(models.Model):
     """Абстрактная модель. Описывает поле статуса публикации
@@ -43,11 +60,18 @@ class Category(BaseModel):
             'разрешены символы латиницы, цифры, дефис и подчёркивание.'
         )
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
 
     class Meta:
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
         ordering = ('title',)
+        indexes = (
+            models.Index(fields=('title',), name='category_title_idx'),
+        )
 
     def __str__(self):
         return self.title[:settings.LIMIT_MED]
@@ -64,6 +88,9 @@ class Location(BaseModel):
         verbose_name = 'местоположение'
         verbose_name_plural = 'Местоположения'
         ordering = ('name',)
+        indexes = (
+            models.Index(fields=('name',), name='location_name_idx'),
+        )
 
     def __str__(self):
         return self.name[:settings.LIMIT_MED]
@@ -75,7 +102,14 @@ class Post(BaseModel):
     текст публикации, дата и время публикации, автор публикации (из
     встроенной модели User - связь N:1), категория публикации (из модели
     Category - связь N:1), местоположение публикации (из модели
-    Location - связь N:1)."""
+    Location - связь N:1), изображение с уменьшенными копиями для
+    карточек и страницы публикации, счётчик комментариев, который
+    поддерживается при записи, чтобы ленты не считали комментарии
+    через JOIN; обычное сохранение публикации счётчик не перезаписывает.
+    Флаг is_visible хранит итог правил видимости, чтобы ленты
+    не сравнивали pub_date с текущим временем при каждом запросе.
+    updated_at меняется при любом изменении публикации и её комментариев
+    и служит для ответов на условные запросы."""
 
     title = models.CharField(
         max_length=settings.LIMIT_MAX,
@@ -112,18 +146,141 @@ class Post(BaseModel):
     image = models.ImageField(
         'Фото',
         upload_to='posts_images',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии фото',
+        help_text='Размеры оригинала и файлы уменьшенных копий.'
+    )
+    excerpt = models.CharField(
+        max_length=settings.LIMIT_MAX,
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Показывается в лентах',
+        help_text=(
+            'Выставляется автоматически: публикация и её категория '
+            'опубликованы, а время публикации наступило.'
+        )
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено',
+        help_text=(
+            'Время последнего изменения публикации или её комментариев.'
+        )
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(fields=('title',), name='post_title_idx'),
+            models.Index(fields=('updated_at',), name='post_updated_idx'),
+            models.Index(
+                fields=('pub_date',),
+                name='post_scheduled_idx',
+                condition=models.Q(is_visible=False, is_published=True)
+            ),
+        )
 
     def __str__(self):
         return self.title[:settings.LIMIT_MED]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Видимость пересчитывается, только если сохраняются поля, от
+        # которых она зависит: иначе устаревший экземпляр (например,
+        # загруженный до снятия с публикации) вернул бы её обратно.
+        check_visibility = (
+            update_fields is None
+            or not VISIBILITY_FIELDS.isdisjoint(update_fields)
+        )
+        if check_visibility:
+            self.is_visible = self.should_be_visible()
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields,
+                'updated_at',
+                *(('is_visible',) if check_visibility else ()),
+                *(('excerpt',) if 'text' in update_fields else ())
+            }
+        # Обработчики post_save (лента, поисковый индекс, задача обработки
+        # фото) выполняются в одной транзакции с записью публикации.
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        # Обычное сохранение не перезаписывает счётчик комментариев:
+        # его двигают только F()-обновления. Если строки нет, Django
+        # вставляет её со всеми полями, как и для любой модели.
+        if update_fields is None:
+            values = [
+                value for value in values if value[0].name != 'comment_count'
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
+    @property
+    def image_pending(self):
+        """Уменьшенные копии изображения ещё готовятся фоновой задачей."""
+        return bool(self.image_variants.get('pending'))
+
+    @property
+    def card_image(self):
+        return responsive_image(self.image, self.image_variants, 'card')
+
+    @property
+    def detail_image(self):
+        return responsive_image(self.image, self.image_variants, 'detail')
+
+    def should_be_visible(self, now=None):
+        return bool(
+            self.is_published
+            and self.category_id
+            and self.category.is_published
+            and self.pub_date <= (now or timezone.now())
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_value(self, attname):
+        """Значение поля на момент загрузки из базы данных или последнего
+        сохранения; для новой публикации - текущее значение."""
+        value = getattr(self, '_loaded_values', {}).get(attname, DEFERRED)
+        return getattr(self, attname) if value is DEFERRED else value
+
 
 class Comment(models.Model):
     """Модель, описывающая комментарии к публикации. Содержит следующие поля:
@@ -148,16 +305,161 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Добавлено'
     )
+    excerpt = models.CharField(
+        max_length=settings.LIMIT_MAX,
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста'
+    )
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         return (
             f'"{self.text[:settings.LIMIT_MED]}" '
-            f'(от автора {self.author.username} на публикацию '
-            f'"{self.post.title}")'
+            f'(комментарий #{self.pk} к публикации #{self.post_id})'
         )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+
+class FeedEntry(models.Model):
+    """Материализованная лента: по строке на каждую видимую публикацию.
+    Хранит только то, что нужно для фильтрации, сортировки и пагинации
+    лент (дата публикации, категория, автор, число комментариев); сами
+    публикации подгружаются по id только для одной страницы."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+        verbose_name='Публикация'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата и время публикации'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='feed_entries',
+        verbose_name='Категория'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='feed_entries',
+        verbose_name='Автор публикации'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество комментариев'
+    )
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date', '-post')
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-post'),
+                name='feed_pub_date_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-post'),
+                name='feed_category_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-post'),
+                name='feed_author_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.pub_date:%Y-%m-%d %H:%M} #{self.post_id}'
+
+
+class Job(models.Model):
+    """Фоновая задача для обработчика run_jobs. Хранит вид задачи, её
+    параметры, состояние и число попыток; задачи, которые не удалось
+    выполнить, откладываются и повторяются до JOB_MAX_ATTEMPTS раз."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField(
+        max_length=settings.LIMIT_MED,
+        verbose_name='Вид задачи'
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name='Параметры'
+    )
+    status = models.CharField(
+        max_length=settings.LIMIT_MIN,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить не раньше'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята в работу'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('id',)
+        indexes = (
+            models.Index(
+                fields=('run_after', 'id'),
+                name='job_pending_idx',
+                condition=models.Q(status='pending')
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.status})'
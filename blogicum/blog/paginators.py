@@ -0,0 +1,207 @@
+import base64
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .cache import feed_count_key
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор лент блога. Количество записей берётся из кеша ленты и
+    пересчитывается только после его сброса. Если записей больше порога
+    FEED_COUNT_ESTIMATE_THRESHOLD, вместо точного COUNT(*) используется
+    оценка, а страницы за её пределами остаются доступными."""
+
+    def __init__(self, object_list, per_page, feed=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if self.feed is None:
+            return self._count()
+        key = feed_count_key(self.feed)
+        cached = cache.get(key)
+        if cached is None:
+            cached = (self._count(), self.estimated)
+            cache.set(key, cached, settings.FEED_COUNT_CACHE_TIMEOUT)
+        count, self.estimated = cached
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.estimated and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if not self.estimated and top + self.orphans >= self.count:
+            top = self.count
+        object_list = self.object_list[bottom:top]
+        if self.estimated and number > self.num_pages:
+            # За пределами оценки страница существует, только если
+            # в ней есть записи.
+            object_list = list(object_list)
+            if not object_list:
+                raise EmptyPage(_('That page contains no results'))
+        return Page(object_list, number, self)
+
+    def _count(self):
+        threshold = settings.FEED_COUNT_ESTIMATE_THRESHOLD
+        count = self.object_list.order_by()[:threshold + 1].count()
+        if count <= threshold:
+            return count
+        self.estimated = True
+        return max(self._estimate(), threshold)
+
+    def _estimate(self):
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return 0
+        sql, params = self.object_list.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации. Вместо номера страницы хранит
+    непрозрачные курсоры соседних страниц."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return self.paginator.encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            return self.paginator.encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Пагинация по ключу сортировки (keyset). Каждая страница выбирается
+    одним диапазонным запросом по индексу независимо от глубины, без
+    OFFSET и без COUNT(*). Порядок задаётся двумя полями с одинаковым
+    направлением, второе поле должно быть уникальным."""
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    def page(self, after=None, before=None):
+        queryset = self.object_list
+        if after:
+            queryset = queryset.filter(self._seek(after, forward=True))
+        elif before:
+            queryset = queryset.filter(self._seek(before, forward=False))
+        if before and not after:
+            ordering = tuple(self._reverse(name) for name in self.ordering)
+        else:
+            ordering = self.ordering
+        items = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if not items:
+            # За курсором записей нет (например, более новые публикации
+            # скрыты): соседних страниц, от которых строить ссылки, нет.
+            return CursorPage(items, self, False, False)
+        if before and not after:
+            items.reverse()
+            return CursorPage(items, self, True, has_more)
+        return CursorPage(items, self, has_more, bool(after))
+
+    def encode_cursor(self, item):
+        values = [self._value(item, name) for name in self.fields]
+        raw = json.dumps(
+            [value.isoformat() if hasattr(value, 'isoformat') else value
+             for value in values]
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (ValueError, TypeError, ValidationError) as error:
+            raise InvalidCursor('Некорректный курсор страницы') from error
+
+    def _seek(self, cursor, forward):
+        first, second = self.fields
+        first_value, second_value = self.decode_cursor(cursor)
+        lookup = 'lt' if self.descending == forward else 'gt'
+        return (
+            Q(**{f'{first}__{lookup}': first_value})
+            | Q(**{first: first_value, f'{second}__{lookup}': second_value})
+        )
+
+    def _field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _value(self, item, name):
+        if isinstance(item, dict):
+            return item[self._field(name).name]
+        return getattr(item, name)
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
@@ -0,0 +1,195 @@
+import re
+from collections import namedtuple
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Comment, Post
+
+FTS_TABLE = 'blog_post_fts'
+COMMENT_FTS_TABLE = 'blog_comment_fts'
+MAX_TERMS = 10
+MARK_START = '\x02'
+MARK_END = '\x03'
+# Совпадение в заголовке весит больше, чем в тексте.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+SNIPPET_TOKENS = 32
+
+SearchHit = namedtuple('SearchHit', ('pk', 'title', 'snippet'))
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Превращает строку запроса в выражение FTS5: каждое слово берётся
+    в кавычки, поэтому операторы и спецсимволы из запроса не ломают
+    синтаксис MATCH. Последнее слово ищется по префиксу."""
+    terms = re.findall(r'\w+', query.lower())[:MAX_TERMS]
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def index_posts(posts):
+    """Записывает заголовок и текст публикаций в поисковый индекс."""
+    _index(FTS_TABLE, ('title', 'text'), posts)
+
+
+def unindex_posts(post_ids):
+    _unindex(FTS_TABLE, post_ids)
+
+
+def index_comments(comments):
+    _index(COMMENT_FTS_TABLE, ('text',), comments)
+
+
+def unindex_comments(comment_ids):
+    _unindex(COMMENT_FTS_TABLE, comment_ids)
+
+
+def unindex_where(table, queryset):
+    """Удаляет из индекса `table` все записи выборки одним DELETE."""
+    if not search_available():
+        return
+    try:
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({sql})', params)
+
+
+def fts_match(table, expression, column=None):
+    """Подзапрос с id записей, найденных в индексе `table` (только по
+    колонке `column`, если она указана), для фильтра pk__in=..."""
+    if column is not None:
+        expression = f'{column} : ({expression})'
+    return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s',
+                  (expression,))
+
+
+def rebuild_search_index(batch_size=1000):
+    """Переиндексирует все публикации и комментарии диапазонами id, каждую
+    пачку в своей транзакции. Возвращает число проиндексированных
+    записей."""
+    if not search_available():
+        return 0
+    return (
+        _rebuild(FTS_TABLE, Post, ('title', 'text'), batch_size)
+        + _rebuild(COMMENT_FTS_TABLE, Comment, ('text',), batch_size)
+    )
+
+
+def _index(table, columns, objects):
+    if not search_available():
+        return
+    rows = [
+        (obj.pk, *(getattr(obj, column) for column in columns))
+        for obj in objects
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {table} WHERE rowid = %s',
+            [row[:1] for row in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, {", ".join(columns)}) '
+            f'VALUES (%s{", %s" * len(columns)})',
+            rows
+        )
+
+
+def _unindex(table, ids):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {table} WHERE rowid = %s', [(pk,) for pk in ids]
+        )
+
+
+def _rebuild(table, model, columns, batch_size):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+    total = 0
+    last_id = 0
+    while True:
+        objects = list(
+            model.objects.filter(pk__gt=last_id).order_by('pk').only(
+                'pk', *columns
+            )[:batch_size]
+        )
+        if not objects:
+            break
+        with transaction.atomic():
+            _index(table, columns, objects)
+        total += len(objects)
+        last_id = objects[-1].pk
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+    return total
+
+
+def _highlight(value):
+    value = escape(value)
+    return mark_safe(
+        value.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Результаты полнотекстового поиска по видимым публикациям,
+    упорядоченные по BM25. Срезы выполняют один запрос с LIMIT/OFFSET,
+    поэтому объект можно передавать в Paginator вместо QuerySet."""
+
+    def __init__(self, query):
+        self.match = match_expression(query) if search_available() else ''
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'JOIN blog_feedentry ON blog_feedentry.post_id = '
+                f'{FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s',
+                [self.match]
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults поддерживает только срезы')
+        start = index.start or 0
+        if not self.match or index.stop is not None and index.stop <= start:
+            return []
+        limit = -1 if index.stop is None else index.stop - start
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {FTS_TABLE}.rowid, '
+                f'highlight({FTS_TABLE}, 0, %s, %s), '
+                f'snippet({FTS_TABLE}, 1, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} '
+                f'JOIN blog_feedentry ON blog_feedentry.post_id = '
+                f'{FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, %s, %s), '
+                f'blog_feedentry.pub_date DESC LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, MARK_START, MARK_END, '…',
+                 SNIPPET_TOKENS, self.match, TITLE_WEIGHT, TEXT_WEIGHT,
+                 limit, start]
+            )
+            return [
+                SearchHit(pk, _highlight(title), _highlight(snippet))
+                for pk, title, snippet in cursor.fetchall()
+            ]
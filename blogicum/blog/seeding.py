@@ -0,0 +1,300 @@
+"""Генератор синтетических данных для нагрузочных проверок. Тексты берутся
+из заранее созданных Faker наборов, а строки вставляются пачками через
+executemany без создания объектов моделей, поэтому миллионы публикаций
+и десятки миллионов комментариев создаются за минуты. Распределения
+неравномерные, как на живом сайте: немногие авторы пишут большую часть
+публикаций, немногие публикации собирают большую часть комментариев,
+часть публикаций отложена или снята с публикации, часть категорий
+и местоположений скрыта. При одном и том же seed и пустой базе
+результат одинаковый (кроме времени относительно момента запуска)."""
+import random
+from array import array
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from .models import Category, Comment, Location, Post, User, make_excerpt
+from .transfer import ImportStats, deferred_indexes, reset_sequences
+
+# Пароль всех созданных пользователей.
+SEED_PASSWORD = 'blogicum'
+FAKER_LOCALE = 'ru_RU'
+TEXT_POOL_SIZE = 2000
+COMMENT_POOL_SIZE = 5000
+# Показатели степенных распределений: чем больше, тем сильнее перекос.
+AUTHOR_SKEW = 1.0
+CATEGORY_SKEW = 1.0
+VIRAL_SKEW = 0.8
+HIDDEN_CATEGORY_SHARE = 0.1
+HIDDEN_LOCATION_SHARE = 0.1
+NO_LOCATION_SHARE = 0.3
+UNPUBLISHED_POST_SHARE = 0.05
+FUTURE_POST_SHARE = 0.02
+HISTORY = timedelta(days=3 * 365)
+FUTURE = timedelta(days=30)
+# Среднее время от публикации до комментария.
+COMMENT_DELAY = timedelta(days=2)
+
+
+def skewed_weights(count, exponent):
+    """Накопленные веса степенного (Zipf) распределения для
+    random.choices(cum_weights=...): k-й элемент весит 1 / k**exponent."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+class BlogSeeder:
+    """Создаёт пользователей, категории, местоположения, публикации
+    и комментарии. progress(label, count, rate) вызывается после каждой
+    пачки."""
+
+    def __init__(self, seed=0, batch_size=10000, progress=None):
+        self.random = random.Random(seed)
+        self.faker = Faker(FAKER_LOCALE)
+        self.faker.seed_instance(seed)
+        self.batch_size = batch_size
+        self.progress = progress
+        self.now = timezone.now()
+        self.stats = ImportStats()
+        # Связанный метод: connection.ops на каждой строке заметно дороже.
+        self._adapt = connection.ops.adapt_datetimefield_value
+
+    def run(self, users, categories, locations, posts, comments,
+            defer_indexes=True):
+        models = (User, Category, Location, Post, Comment)
+        indexes = deferred_indexes(models) if defer_indexes else nullcontext()
+        with indexes:
+            user_ids = self.create_users(users)
+            category_ids = self.create_categories(categories)
+            location_ids = self.create_locations(locations)
+            commentable = self.create_posts(
+                posts, user_ids, category_ids, location_ids
+            )
+            self.create_comments(comments, commentable, user_ids)
+        reset_sequences(models)
+        return self.stats
+
+    def create_users(self, count):
+        password = make_password(SEED_PASSWORD)
+        first_id = _next_id(User)
+        faker = self.faker
+
+        def rows():
+            for pk in range(first_id, first_id + count):
+                joined = self.now - HISTORY * self.random.random()
+                yield (
+                    pk, password, False, f'{faker.user_name()}{pk}',
+                    faker.first_name(), faker.last_name(),
+                    f'user{pk}@{faker.free_email_domain()}',
+                    False, True, self._datetime(joined),
+                )
+
+        self._insert(User, (
+            'id', 'password', 'is_superuser', 'username', 'first_name',
+            'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
+        ), rows())
+        return list(range(first_id, first_id + count))
+
+    def create_categories(self, count):
+        first_id = _next_id(Category)
+        created = self._datetime(self.now - HISTORY)
+        rows = [
+            (
+                pk,
+                self.random.random() >= HIDDEN_CATEGORY_SHARE,
+                created,
+                self.faker.sentence(nb_words=2).rstrip('.'),
+                self.faker.paragraph(),
+                f'category-{pk}',
+                created,
+            )
+            for pk in range(first_id, first_id + count)
+        ]
+        self._insert(Category, (
+            'id', 'is_published', 'created_at', 'title', 'description',
+            'slug', 'updated_at',
+        ), rows)
+        return [(pk, is_published) for pk, is_published, *_ in rows]
+
+    def create_locations(self, count):
+        first_id = _next_id(Location)
+        created = self._datetime(self.now - HISTORY)
+        rows = [
+            (
+                pk,
+                self.random.random() >= HIDDEN_LOCATION_SHARE,
+                created,
+                self.faker.city(),
+            )
+            for pk in range(first_id, first_id + count)
+        ]
+        self._insert(
+            Location, ('id', 'is_published', 'created_at', 'name'), rows
+        )
+        return [pk for pk, *_ in rows]
+
+    def create_posts(self, count, user_ids, categories, location_ids):
+        """Создаёт публикации и возвращает те, что можно комментировать:
+        пары (id, время публикации) видимых публикаций."""
+        rng = self.random
+        titles = [
+            self.faker.sentence(nb_words=rng.randint(2, 8)).rstrip('.')
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        texts = [
+            '\n\n'.join(self.faker.paragraphs(nb=rng.randint(1, 5)))
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        excerpts = [make_excerpt(text) for text in texts]
+        authors = self._shuffled(user_ids)
+        author_weights = skewed_weights(len(authors), AUTHOR_SKEW)
+        category_list = self._shuffled(categories)
+        category_weights = skewed_weights(len(category_list), CATEGORY_SKEW)
+        variants = Post._meta.get_field('image_variants').get_db_prep_save(
+            {}, connection
+        )
+        first_id = _next_id(Post)
+        commentable_ids = array('q')
+        commentable_dates = array('d')
+        now = self.now.timestamp()
+
+        def rows():
+            for start in range(first_id, first_id + count, self.batch_size):
+                size = min(self.batch_size, first_id + count - start)
+                picked_authors = rng.choices(
+                    authors, cum_weights=author_weights, k=size
+                )
+                picked_categories = rng.choices(
+                    category_list, cum_weights=category_weights, k=size
+                )
+                for offset in range(size):
+                    pk = start + offset
+                    author_id = picked_authors[offset]
+                    category_id, category_published = (
+                        picked_categories[offset]
+                    )
+                    self.stats.author_ids.add(author_id)
+                    self.stats.category_ids.add(category_id)
+                    if rng.random() < FUTURE_POST_SHARE:
+                        pub_date = now + FUTURE.total_seconds() * rng.random()
+                        created = now
+                    else:
+                        # Недавних публикаций больше, чем старых.
+                        pub_date = now - HISTORY.total_seconds() * (
+                            rng.random() ** 2
+                        )
+                        created = pub_date
+                    is_published = rng.random() >= UNPUBLISHED_POST_SHARE
+                    if (is_published and category_published
+                            and pub_date <= now):
+                        commentable_ids.append(pk)
+                        commentable_dates.append(pub_date)
+                    location_id = None
+                    if location_ids and rng.random() >= NO_LOCATION_SHARE:
+                        location_id = rng.choice(location_ids)
+                    text = rng.randrange(TEXT_POOL_SIZE)
+                    created = self._timestamp(created)
+                    yield (
+                        pk, is_published, created,
+                        titles[rng.randrange(TEXT_POOL_SIZE)],
+                        texts[text], self._timestamp(pub_date), author_id,
+                        category_id, location_id, '', variants,
+                        excerpts[text], 0, False, created,
+                    )
+
+        self._insert(Post, (
+            'id', 'is_published', 'created_at', 'title', 'text', 'pub_date',
+            'author', 'category', 'location', 'image', 'image_variants',
+            'excerpt', 'comment_count', 'is_visible', 'updated_at',
+        ), rows())
+        return commentable_ids, commentable_dates
+
+    def create_comments(self, count, commentable, user_ids):
+        post_ids, post_dates = commentable
+        if not post_ids or not count:
+            return
+        rng = self.random
+        texts = [
+            self.faker.text(max_nb_chars=rng.randint(20, 400))
+            for _ in range(COMMENT_POOL_SIZE)
+        ]
+        excerpts = [make_excerpt(text) for text in texts]
+        # Вирусные публикации выбираются случайно, а не по возрасту.
+        posts = self._shuffled(range(len(post_ids)))
+        post_weights = skewed_weights(len(posts), VIRAL_SKEW)
+        authors = self._shuffled(user_ids)
+        author_weights = skewed_weights(len(authors), AUTHOR_SKEW)
+        first_id = _next_id(Comment)
+        now = self.now.timestamp()
+        delay = 1 / COMMENT_DELAY.total_seconds()
+
+        def rows():
+            for start in range(first_id, first_id + count, self.batch_size):
+                size = min(self.batch_size, first_id + count - start)
+                picked_posts = rng.choices(
+                    posts, cum_weights=post_weights, k=size
+                )
+                picked_authors = rng.choices(
+                    authors, cum_weights=author_weights, k=size
+                )
+                for offset in range(size):
+                    post = picked_posts[offset]
+                    text = rng.randrange(COMMENT_POOL_SIZE)
+                    created = min(
+                        post_dates[post] + rng.expovariate(delay), now
+                    )
+                    yield (
+                        start + offset, texts[text], post_ids[post],
+                        picked_authors[offset], self._timestamp(created),
+                        excerpts[text],
+                    )
+
+        self._insert(Comment, (
+            'id', 'text', 'post', 'author', 'created_at', 'excerpt',
+        ), rows())
+
+    def _shuffled(self, items):
+        items = list(items)
+        self.random.shuffle(items)
+        return items
+
+    def _datetime(self, value):
+        return self._adapt(value)
+
+    def _timestamp(self, value):
+        return self._adapt(datetime.fromtimestamp(value, tz=dt_timezone.utc))
+
+    def _insert(self, model, fields, rows):
+        """Вставляет строки пачками по batch_size, каждую пачку одним
+        executemany в своей транзакции."""
+        quote = connection.ops.quote_name
+        columns = ', '.join(
+            quote(model._meta.get_field(name).column) for name in fields
+        )
+        sql = (
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))})'
+        )
+        label = model._meta.label_lower
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            inserted = self.stats.inserted.get(label, 0) + len(batch)
+            self.stats.inserted[label] = inserted
+            if self.progress:
+                self.progress(label, inserted, self.stats.rate())
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
@@ -0,0 +1,233 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import invalidate, post_tag
+from .models import Category, Comment, FeedEntry, Post
+
+
+def recount_comments(batch_size=None, touch=True):
+    """Сверяет хранимые счётчики комментариев с таблицей комментариев
+    и исправляет расхождения; с touch=False время изменения исправленных
+    публикаций не обновляется. Возвращает число исправленных публикаций."""
+    actual = Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+                'post'
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+    posts = Post.objects.order_by()
+    if not batch_size:
+        return _recount_range(posts, actual, touch)
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(
+            posts.filter(pk__gt=last_id).order_by('pk').values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return updated
+        updated += _recount_range(
+            posts.filter(pk__gte=ids[0], pk__lte=ids[-1]), actual, touch
+        )
+        last_id = ids[-1]
+
+
+def _recount_range(posts, actual, touch):
+    with transaction.atomic():
+        stale = posts.annotate(actual=actual).exclude(
+            comment_count=F('actual')
+        ).values_list('pk', flat=True)
+        stale = list(stale)
+        updated = Post.objects.filter(pk__in=stale).update(
+            comment_count=actual,
+            **({'updated_at': timezone.now()} if touch else {})
+        )
+        FeedEntry.objects.filter(pk__in=stale).update(
+            comment_count=Subquery(
+                Post.objects.filter(pk=OuterRef('pk')).values('comment_count')
+            )
+        )
+    # Счётчик выводится на странице публикации и в её карточке.
+    invalidate(*(post_tag(pk) for pk in stale))
+    return updated
+
+
+def visible_q(now=None):
+    return Q(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=now or timezone.now()
+    )
+
+
+def refresh_visibility(posts, now=None):
+    """Пересчитывает флаг is_visible у выбранных публикаций одним
+    UPDATE на каждое направление изменения и обновляет по ним
+    материализованную ленту."""
+    visible = visible_q(now)
+    updated_at = timezone.now()
+    shown = posts.filter(visible, is_visible=False).update(
+        is_visible=True, updated_at=updated_at
+    )
+    hidden = posts.filter(is_visible=True).exclude(visible).update(
+        is_visible=False, updated_at=updated_at
+    )
+    if shown or hidden:
+        sync_feed_entries(posts)
+    return shown + hidden
+
+
+def publish_scheduled():
+    """Показывает отложенные публикации, время которых наступило.
+    Публикации сохраняются по одной, чтобы сработали те же сигналы
+    сброса кешей, что и при редактировании. Каждая публикация заново
+    читается в своей транзакции: пока шёл обход, её могли снять
+    с публикации или перенести."""
+    due = Post.objects.select_related('category').filter(
+        visible_q(), is_visible=False
+    )
+    published = 0
+    for pk in due.values_list('pk', flat=True).iterator():
+        with transaction.atomic():
+            post = due.select_for_update(of=('self',)).filter(pk=pk).first()
+            if post is None:
+                continue
+            post.save(update_fields=('is_visible',))
+        published += post.is_visible
+    return published
+
+
+def last_update():
+    """Время последнего изменения публикаций (вместе с их комментариями)
+    и категорий или None, если их нет. Оба MAX читаются по индексу
+    или по маленькой таблице категорий."""
+    return max(
+        filter(None, (
+            Post.objects.aggregate(last=Max('updated_at'))['last'],
+            Category.objects.aggregate(last=Max('updated_at'))['last'],
+        )),
+        default=None
+    )
+
+
+def next_scheduled(now=None):
+    """Время ближайшей отложенной публикации или None."""
+    return Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        is_visible=False,
+        pub_date__gt=now or timezone.now()
+    ).aggregate(next=Min('pub_date'))['next']
+
+
+def sync_feed_entries(posts, batch_size=1000):
+    """Приводит материализованную ленту в соответствие с выбранными
+    публикациями: видимые публикации (пере)записываются, остальные
+    удаляются."""
+    FeedEntry.objects.filter(post__in=posts.values('pk')).delete()
+    rows = posts.filter(is_visible=True).order_by().values_list(
+        'pk', 'pub_date', 'category_id', 'author_id', 'comment_count'
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                post_id=pk,
+                pub_date=pub_date,
+                category_id=category_id,
+                author_id=author_id,
+                comment_count=comment_count
+            )
+            for pk, pub_date, category_id, author_id, comment_count
+            in rows.iterator()
+        ),
+        batch_size=batch_size
+    )
+
+
+def rebuild_feed(batch_size=10000):
+    """Пересобирает материализованную ленту целиком, диапазонами id.
+    Возвращает число записей в ленте."""
+    last_id = 0
+    while True:
+        ids = list(
+            Post.objects.filter(pk__gt=last_id).order_by('pk').values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            sync_feed_entries(
+                Post.objects.filter(pk__gte=ids[0], pk__lte=ids[-1]),
+                batch_size=batch_size
+            )
+        last_id = ids[-1]
+    FeedEntry.objects.exclude(post__in=Post.objects.values('pk')).delete()
+    return FeedEntry.objects.count()
+
+
+def rehash_post_images(batch_size=500, delete_originals=False):
+    """Переносит фото публикаций и их уменьшенные копии из старых имён
+    (posts_images/<имя>.jpg) в хранилище с именами по хешу содержимого.
+    Публикации обрабатываются диапазонами id, каждая пачка обновляется
+    одним bulk_update в своей транзакции. Возвращает число изменённых
+    публикаций."""
+    storage = Post._meta.get_field('image').storage
+    renamed = {}
+    moved = 0
+    last_id = 0
+    while True:
+        posts = list(
+            Post.objects.exclude(image='').filter(pk__gt=last_id).order_by(
+                'pk'
+            ).only('pk', 'image', 'image_variants')[:batch_size]
+        )
+        if not posts:
+            break
+        last_id = posts[-1].pk
+        changed = []
+        for post in posts:
+            image = _rehash_file(storage, post.image.name, renamed)
+            sizes = [
+                size
+                for kind in post.image_variants.get('variants', {}).values()
+                for size in kind
+            ]
+            variants_changed = False
+            for size in sizes:
+                name = _rehash_file(storage, size['name'], renamed)
+                variants_changed |= name != size['name']
+                size['name'] = name
+            if image != post.image.name or variants_changed:
+                post.image.name = image
+                post.updated_at = timezone.now()
+                changed.append(post)
+        if changed:
+            with transaction.atomic():
+                Post.objects.bulk_update(
+                    changed, ('image', 'image_variants', 'updated_at')
+                )
+            invalidate(*(post_tag(post.pk) for post in changed))
+            moved += len(changed)
+        if delete_originals:
+            for name in list(renamed):
+                if not Post.objects.filter(image=name).exists():
+                    storage.delete(name)
+                    del renamed[name]
+    return moved
+
+
+def _rehash_file(storage, name, renamed):
+    if name in renamed:
+        return renamed[name]
+    if storage.is_hashed(name) or not storage.exists(name):
+        return name
+    with storage.open(name) as file:
+        renamed[name] = storage.save(name, file)
+    return renamed[name]
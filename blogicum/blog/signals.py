@@ -0,0 +1,214 @@
+import threading
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import (author_feed, category_feed, index_feed, invalidate,
+                    location_tag, post_tag, user_tag)
+from .jobs import enqueue
+from .models import Category, Comment, FeedEntry, Location, Post, User
+from .search import (index_comments, index_posts, unindex_comments,
+                     unindex_posts)
+from .services import refresh_visibility, sync_feed_entries
+
+_deleting = threading.local()
+
+
+def _deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    _deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleting_post(sender, instance, **kwargs):
+    _deleting_posts().discard(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    posts = Post.objects.filter(pk=instance.post_id)
+    if not created:
+        posts.update(updated_at=timezone.now())
+        return
+    posts.update(
+        comment_count=F('comment_count') + 1, updated_at=timezone.now()
+    )
+    FeedEntry.objects.filter(pk=instance.post_id).update(
+        comment_count=F('comment_count') + 1
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    if instance.post_id in _deleting_posts():
+        return
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        updated_at=timezone.now()
+    )
+    FeedEntry.objects.filter(
+        pk=instance.post_id,
+        comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+def post_feeds(post):
+    """Ленты, в которые публикация входит сейчас или входила до
+    изменения. Публикация, которая не была и не стала видимой (черновик,
+    отложенная), есть только в профиле автора, открытом им самим."""
+    authors = {post.author_id, post.get_loaded_value('author_id')}
+    feeds = {author_feed(author_id, own=True) for author_id in authors}
+    if not (post.is_visible or post.get_loaded_value('is_visible')):
+        return feeds
+    feeds.add(index_feed())
+    for category_id in {post.category_id,
+                        post.get_loaded_value('category_id')}:
+        if category_id:
+            feeds.add(category_feed(category_id))
+    feeds.update(author_feed(author_id) for author_id in authors)
+    return feeds
+
+
+def category_feeds(category):
+    authors = Post.objects.filter(category=category).order_by().values_list(
+        'author_id', flat=True
+    ).distinct()
+    return {index_feed(), category_feed(category.pk),
+            *(author_feed(author_id) for author_id in authors)}
+
+
+@receiver(post_save, sender=Post)
+def update_image_variants(sender, instance, created, **kwargs):
+    if not created and instance.image == instance.get_loaded_value('image'):
+        return
+    instance.image_variants = {'pending': True} if instance.image else {}
+    Post.objects.filter(pk=instance.pk).update(
+        image_variants=instance.image_variants
+    )
+    if instance.image:
+        enqueue(
+            'post_image_variants',
+            post_id=instance.pk,
+            image=instance.image.name
+        )
+
+
+@receiver(post_save, sender=Post)
+def sync_post_feed_entry(sender, instance, **kwargs):
+    sync_feed_entries(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'text'} & update_fields:
+        return
+    if (created
+            or instance.title != instance.get_loaded_value('title')
+            or instance.text != instance.get_loaded_value('text')):
+        index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    unindex_posts([instance.pk])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    invalidate(post_tag(instance.pk), *post_feeds(instance))
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        index_comments([instance])
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    unindex_comments([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate(post_tag(instance.post_id))
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_posts(sender, instance, **kwargs):
+    refresh_visibility(Post.objects.filter(category=instance))
+
+
+@receiver(pre_delete, sender=Category)
+def hide_category_posts(sender, instance, **kwargs):
+    Post.objects.filter(category=instance).update(
+        is_visible=False, updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    invalidate(*category_feeds(instance))
+
+
+def card_feeds(posts):
+    """Ленты, в которых выводятся карточки выбранных публикаций: видимые
+    публикации - во всех своих лентах, скрытые - только в профиле
+    автора, открытом им самим."""
+    feeds = set()
+    rows = posts.order_by().values_list(
+        'category_id', 'author_id', 'is_visible'
+    ).distinct()
+    for category_id, author_id, is_visible in rows:
+        feeds.add(author_feed(author_id, own=True))
+        if is_visible:
+            feeds.update((
+                index_feed(),
+                category_feed(category_id),
+                author_feed(author_id),
+            ))
+    return feeds
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def invalidate_location(sender, instance, **kwargs):
+    # Название места выводится в карточках, поэтому сбрасываются и ленты,
+    # в которых есть публикации с этим местом.
+    invalidate(
+        location_tag(instance.pk),
+        *card_feeds(Post.objects.filter(location=instance))
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, update_fields=None,
+                    **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    tags = {user_tag(instance.pk)}
+    if not created:
+        # Имя автора выводится в его профиле и в карточках его публикаций,
+        # имя комментатора - на странице публикации.
+        commented = Comment.objects.filter(author=instance).order_by()
+        tags.update((
+            author_feed(instance.pk),
+            author_feed(instance.pk, own=True),
+            *card_feeds(Post.objects.filter(author=instance)),
+            *(post_tag(post_id) for post_id in commented.values_list(
+                'post_id', flat=True
+            ).distinct()),
+        ))
+    invalidate(*tags)
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_NAME = re.compile(
+    r'^(?:[^/]+/)?[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$'
+)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла - это SHA-256 его содержимого.
+    Первая часть исходного имени (каталог upload_to) сохраняется, а файлы
+    раскладываются по вложенным каталогам по первым символам хеша:
+    posts_images/ab/cd/abcd...ef.jpg. Одинаковые загрузки хранятся
+    один раз, а суффиксы для совпадающих имён не нужны."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        saved = self._save(name, content)
+        if saved != name:
+            # Такой же файл успел сохранить параллельный запрос.
+            self.delete(saved)
+        return name
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        parts = name.replace('\\', '/').split('/')
+        namespace = parts[:1] if len(parts) > 1 else []
+        extension = os.path.splitext(name)[1].lower()
+        return '/'.join(
+            (*namespace, digest[:2], digest[2:4], digest + extension)
+        )
+
+    @staticmethod
+    def is_hashed(name):
+        return bool(HASH_NAME.match(name))
@@ -0,0 +1,392 @@
+"""Потоковый импорт и экспорт данных блога в формате фикстур Django:
+массив JSON (как db.json) или NDJSON - по объекту на строку. Записи
+читаются и пишутся по одной, поэтому память не зависит от размера файла.
+Импорт вставляет строки через bulk_create без сигналов, а производные
+данные (видимость, счётчики, ленту, поисковый индекс) пересчитывает
+одним проходом в конце."""
+import gzip
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import author_feed, category_feed, index_feed, invalidate
+from .jobs import enqueue_image_variants
+from .models import Category, Comment, Location, Post, User, make_excerpt
+from .search import rebuild_search_index
+from .services import rebuild_feed, recount_comments, visible_q
+
+# Модели в порядке зависимостей: экспорт пишет их именно так.
+MODELS = (User, Category, Location, Post, Comment)
+# Поля времени, которые Django заполняет сам (auto_now, auto_now_add).
+TIMESTAMP_FIELDS = {
+    model: [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for model in MODELS
+}
+JSON = 'json'
+NDJSON = 'ndjson'
+FORMATS = (JSON, NDJSON)
+READ_SIZE = 1 << 16
+
+
+def guess_format(path):
+    """Формат по расширению файла; stdin и .ndjson/.jsonl - NDJSON."""
+    name = path[:-3] if path.endswith('.gz') else path
+    return JSON if name.endswith('.json') else NDJSON
+
+
+@contextmanager
+def open_dump(path, mode):
+    """Файл дампа в текстовом режиме; '-' - stdin/stdout, .gz - gzip."""
+    if path == '-':
+        yield sys.stdin if mode == 'r' else sys.stdout
+    elif path.endswith('.gz'):
+        with gzip.open(path, mode + 't', encoding='utf-8') as file:
+            yield file
+    else:
+        with open(path, mode, encoding='utf-8') as file:
+            yield file
+
+
+def read_records(file, format):
+    if format == NDJSON:
+        return (json.loads(line) for line in file if line.strip())
+    return _read_json_array(file)
+
+
+def _read_json_array(file):
+    """Объекты массива JSON по одному: в памяти держится только текущий
+    объект и ещё не разобранный остаток прочитанного блока."""
+    decoder = json.JSONDecoder()
+    buffer = _next_value(file, '')
+    if not buffer.startswith('['):
+        raise ValueError('Ожидался массив JSON')
+    buffer = _next_value(file, buffer[1:])
+    while not buffer.startswith(']'):
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield record
+        buffer = _next_value(file, buffer[end:])
+
+
+def _next_value(file, buffer):
+    """Буфер без пробелов и запятых в начале; пустой буфер дочитывается
+    из файла."""
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if buffer:
+            return buffer
+        buffer = file.read(READ_SIZE)
+        if not buffer:
+            raise ValueError('Массив JSON не закрыт')
+
+
+def write_records(file, records, format):
+    """Пишет записи по одной; возвращает их число."""
+    count = 0
+    if format == JSON:
+        file.write('[')
+    for record in records:
+        line = json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+        if format == JSON:
+            file.write(',\n' if count else '\n')
+            file.write(line)
+        else:
+            file.write(line + '\n')
+        count += 1
+    if format == JSON:
+        file.write('\n]\n')
+    return count
+
+
+def export_records(batch_size=2000, progress=None):
+    """Записи всех моделей блога в формате фикстур. Каждая модель
+    читается диапазонами pk через values_list(), без создания объектов.
+    progress(label, count, rate) вызывается после каждой пачки."""
+    started = time.monotonic()
+    total = 0
+    for model in MODELS:
+        label = model._meta.label_lower
+        fields = [
+            field for field in model._meta.local_fields
+            if field.serialize
+        ]
+        columns = ['pk', *(field.attname for field in fields)]
+        count = 0
+        last_pk = None
+        while True:
+            rows = model.objects.order_by('pk')
+            if last_pk is not None:
+                rows = rows.filter(pk__gt=last_pk)
+            rows = list(rows.values_list(*columns)[:batch_size])
+            if not rows:
+                break
+            for pk, *values in rows:
+                yield {
+                    'model': label,
+                    'pk': pk,
+                    'fields': {
+                        field.name: value
+                        for field, value in zip(fields, values)
+                    },
+                }
+            count += len(rows)
+            total += len(rows)
+            last_pk = rows[-1][0]
+            if progress:
+                progress(label, count, _rate(total, started))
+
+
+class ImportStats:
+    """Счётчики импорта по моделям."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.inserted = {}
+        self.skipped = {}
+        self.category_ids = set()
+        self.author_ids = set()
+
+    @property
+    def total(self):
+        return sum(self.inserted.values())
+
+    def rate(self):
+        return _rate(self.total, self.started)
+
+
+def _rate(count, started):
+    """Строк в секунду с момента started."""
+    return count / max(time.monotonic() - started, 1e-9)
+
+
+def _prepare_post(post, stats):
+    post.excerpt = make_excerpt(post.text)
+    post.is_visible = False
+    post.comment_count = 0
+    if post.category_id:
+        stats.category_ids.add(post.category_id)
+    stats.author_ids.add(post.author_id)
+
+
+def _prepare_comment(comment, stats):
+    comment.excerpt = make_excerpt(comment.text)
+
+
+PREPARE = {Post: _prepare_post, Comment: _prepare_comment}
+
+
+def import_records(records, batch_size=1000, chunk_size=20000,
+                   defer_indexes=True, progress=None, stats=None):
+    """Загружает записи фикстуры. Строки вставляются bulk_create пачками
+    по batch_size, каждые chunk_size строк - в своей транзакции. Записи
+    других моделей (права, сессии, журнал админки) пропускаются.
+    Проверка внешних ключей откладывается до конца загрузки, как в
+    loaddata, а вторичные индексы таблиц блога на время загрузки
+    удаляются и затем создаются заново. progress(label, count, rate)
+    вызывается после каждой пачки. Время создания и изменения строк
+    берётся из дампа, как при raw-сохранении в loaddata; если его в дампе
+    нет, ставится время загрузки. Возвращает ImportStats (можно передать
+    свой объект в stats).
+
+    Загрузка не атомарна: при ошибке уже загруженные части остаются
+    в базе, откатывается только текущая. Чтобы производные данные
+    соответствовали загруженным строкам, после ошибки тоже нужно вызвать
+    finish_import(stats), как это делает команда import_blog."""
+    stats = stats or ImportStats()
+    labels = {model._meta.label_lower for model in MODELS}
+
+    def supported():
+        for record in records:
+            label = record.get('model', '').lower()
+            if label in labels:
+                yield record
+            else:
+                stats.skipped[label] = stats.skipped.get(label, 0) + 1
+
+    objects = (
+        item.object
+        for item in Deserializer(supported(), ignorenonexistent=True)
+    )
+    indexes = deferred_indexes(MODELS) if defer_indexes else nullcontext()
+    with connection.constraint_checks_disabled(), stored_timestamps(), \
+            indexes:
+        while True:
+            with transaction.atomic():
+                inserted = _insert_chunk(
+                    objects, batch_size, chunk_size, stats, progress
+                )
+            if not inserted:
+                break
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in MODELS]
+        )
+    reset_sequences(MODELS)
+    return stats
+
+
+def _insert_chunk(objects, batch_size, chunk_size, stats, progress):
+    batch = []
+    inserted = 0
+    for obj in islice(objects, chunk_size):
+        if batch and (obj._meta.model is not batch[0]._meta.model
+                      or len(batch) >= batch_size):
+            inserted += _insert_batch(batch, stats, progress)
+            batch = []
+        prepare = PREPARE.get(obj._meta.model)
+        if prepare:
+            prepare(obj, stats)
+        batch.append(obj)
+    if batch:
+        inserted += _insert_batch(batch, stats, progress)
+    return inserted
+
+
+def _insert_batch(batch, stats, progress):
+    model = batch[0]._meta.model
+    now = timezone.now()
+    for field in TIMESTAMP_FIELDS[model]:
+        for obj in batch:
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, now)
+    model.objects.bulk_create(batch)
+    label = model._meta.label_lower
+    stats.inserted[label] = stats.inserted.get(label, 0) + len(batch)
+    if progress:
+        progress(label, stats.inserted[label], stats.rate())
+    return len(batch)
+
+
+def reset_sequences(models):
+    """Сдвигает последовательности id (PostgreSQL) за вставленные
+    вручную значения."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+@contextmanager
+def stored_timestamps():
+    """Отключает auto_now и auto_now_add у полей TIMESTAMP_FIELDS, чтобы
+    bulk_create сохранил время из дампа. Флаги принадлежат полям модели,
+    поэтому на время загрузки они отключены во всём процессе."""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model_fields in TIMESTAMP_FIELDS.values()
+        for field in model_fields
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+@contextmanager
+def deferred_indexes(models):
+    """Удаляет неуникальные индексы таблиц на время массовой вставки
+    и создаёт их заново по сохранённому определению. Поддерживаются
+    SQLite и PostgreSQL; на других СУБД индексы не трогаются."""
+    saved = []
+    for model in models:
+        saved.extend(_secondary_indexes(model._meta.db_table))
+    with connection.cursor() as cursor:
+        for name, _ in saved:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in saved:
+                cursor.execute(sql)
+
+
+def _secondary_indexes(table):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = %s AND sql IS NOT NULL",
+                [table]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT indexname, indexdef FROM pg_indexes '
+                'WHERE tablename = %s',
+                [table]
+            )
+        else:
+            return []
+        rows = cursor.fetchall()
+    return [
+        (name, sql) for name, sql in rows
+        if not sql.upper().startswith('CREATE UNIQUE')
+    ]
+
+
+def finish_import(stats, batch_size=10000, search_index=True):
+    """Пересчитывает то, что при обычном сохранении делают сигналы:
+    видимость публикаций, счётчики комментариев, материализованную
+    ленту, поисковый индекс (если не передан search_index=False),
+    ставит в очередь уменьшенные копии фото и сбрасывает кеши
+    затронутых лент."""
+    now = timezone.now()
+    Post.objects.filter(visible_q(now), is_visible=False).update(
+        is_visible=True
+    )
+    Post.objects.filter(is_visible=True).exclude(visible_q(now)).update(
+        is_visible=False
+    )
+    # Счётчики импортированных публикаций обнулены при загрузке; их
+    # пересчёт не должен менять время изменения из дампа.
+    recount_comments(batch_size=batch_size, touch=False)
+    rebuild_feed(batch_size=batch_size)
+    if search_index:
+        rebuild_search_index(batch_size=batch_size)
+    enqueue_image_variants()
+    invalidate(
+        index_feed(),
+        *(category_feed(pk) for pk in stats.category_ids),
+        *(author_feed(pk) for pk in stats.author_ids),
+        *(author_feed(pk, own=True) for pk in stats.author_ids),
+    )
+
+
+class ProgressReport:
+    """Выводит ход загрузки в `stream` при смене модели и не чаще раза
+    в `interval` секунд, чтобы лог не рос с каждой пачкой."""
+
+    def __init__(self, stream, interval=1.0):
+        self.stream = stream
+        self.interval = interval
+        self.label = None
+        self.reported = 0
+
+    def __call__(self, label, count, rate):
+        now = time.monotonic()
+        if label == self.label and now - self.reported < self.interval:
+            return
+        self.label = label
+        self.reported = now
+        self.stream.write(f'{label}: {count} записей, {rate:.0f} записей/с')
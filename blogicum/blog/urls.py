@@ -1,6 +1,7 @@
 from django.urls import path
+from django.utils.feedgenerator import Atom1Feed
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'blog'
 
@@ -14,6 +15,9 @@ urlpatterns = [
     path('posts/<int:post_id>/delete/',
          views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/<int:post_id>/comments/',
+         views.PostCommentsView.as_view(),
+         name='post_comments'),
     path('posts/<int:post_id>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
@@ -29,11 +33,52 @@ urlpatterns = [
     path('category/<slug:category_slug>/',
          views.CategoryPostListView.as_view(),
          name='category_posts'),
+    path('category/<slug:category_slug>/feed/',
+         views.FeedView.as_view(feed_class=feeds.CategoryPostFeed),
+         name='category_feed'),
+    path('category/<slug:category_slug>/feed/atom/',
+         views.FeedView.as_view(
+             feed_class=feeds.CategoryPostFeed, feed_type=Atom1Feed
+         ),
+         name='category_atom_feed'),
     path('edit_profile/',
          views.ProfileUpdateView.as_view(),
          name='edit_profile'),
     path('profile/<slug:username>/',
          views.ProfileListView.as_view(),
          name='profile'),
+    path('profile/<slug:username>/feed/',
+         views.FeedView.as_view(feed_class=feeds.ProfilePostFeed),
+         name='profile_feed'),
+    path('profile/<slug:username>/feed/atom/',
+         views.FeedView.as_view(
+             feed_class=feeds.ProfilePostFeed, feed_type=Atom1Feed
+         ),
+         name='profile_atom_feed'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('feed/',
+         views.FeedView.as_view(feed_class=feeds.PostFeed),
+         name='feed'),
+    path('feed/atom/',
+         views.FeedView.as_view(
+             feed_class=feeds.PostFeed, feed_type=Atom1Feed
+         ),
+         name='atom_feed'),
+    path('api/v1/posts/', api.PostListView.as_view(), name='api_posts'),
+    path('api/v1/posts/<int:post_id>/',
+         api.PostDetailView.as_view(),
+         name='api_post'),
+    path('api/v1/posts/<int:post_id>/comments/',
+         api.CommentListView.as_view(),
+         name='api_comments'),
+    path('api/v1/categories/',
+         api.CategoryListView.as_view(),
+         name='api_categories'),
+    path('api/v1/categories/<slug:category_slug>/posts/',
+         api.CategoryPostListView.as_view(),
+         name='api_category_posts'),
+    path('api/v1/profiles/<slug:username>/posts/',
+         api.ProfilePostListView.as_view(),
+         name='api_profile_posts'),
     path('', views.IndexListView.as_view(), name='index'),
 ]
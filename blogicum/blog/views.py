@@ -1,64 +1,195 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import models
-from django.http.response import Http404
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.http import Http404, QueryDict
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
-from django.utils import timezone
+from django.utils.feedgenerator import Rss201rev2Feed
 from django.views import generic
 
+from .cache import (author_feed, category_feed, index_feed, post_tags,
+                    user_tag)
 from .forms import CommentForm, PostForm, UserEditForm
-from .mixins import AuthorMixin, CommentMixin, PostMixin, SetMixin
+from .mixins import (AuthorMixin, CommentMixin, ConditionalGetMixin,
+                     PageCacheMixin, PostMixin, SetMixin)
 from .models import Category, Comment, Post, User
+from .paginators import CursorPaginator
+from .search import SearchResults
+from .services import last_update
 
 
-class IndexListView(SetMixin, generic.ListView):
+class IndexListView(ConditionalGetMixin, PageCacheMixin, SetMixin,
+                    generic.ListView):
     template_name = 'blog/index.html'
 
+    def get_validators(self):
+        if not self.is_first_page():
+            return None
+        return [index_feed()], last_update()
 
-class PostDetailView(generic.edit.FormMixin, generic.DetailView):
+
+class PostDetailView(ConditionalGetMixin, PageCacheMixin,
+                     generic.edit.FormMixin, generic.DetailView):
     model = Post
     pk_url_kwarg = 'post_id'
     form_class = CommentForm
     template_name = 'blog/detail.html'
+    cache_params = ('after',)
+
+    def get_validators(self):
+        post = self.get_object()
+        if self.request.GET.get('after'):
+            return None
+        updated_at = post.updated_at
+        if post.category is not None:
+            updated_at = max(updated_at, post.category.updated_at)
+        return post_tags(post), updated_at
 
     def get_object(self):
-        self.post = get_object_or_404(
-            Post,
-            id=self.kwargs['post_id']
-        )
-        if ((self.post.is_published is False
-                or self.post.category.is_published is False
-                or self.post.pub_date > timezone.now())
-                and self.post.author != self.request.user):
-            raise Http404
-        return self.post
+        if not hasattr(self, '_object'):
+            self._object = get_object_or_404(
+                Post.objects.select_related(
+                    'category', 'location', 'author'
+                ).filter(
+                    Q(is_visible=True) | Q(author_id=self.request.user.id)
+                ),
+                id=self.kwargs['post_id']
+            )
+        return self._object
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comments'] = (self.object.comments.select_related('author'))
+        paginator = CursorPaginator(
+            self.object.comments.select_related('author'),
+            settings.COMMENTS_PER_PAGE,
+            ordering=('created_at', 'pk')
+        )
+        try:
+            context['comments'] = paginator.page(
+                after=self.request.GET.get('after')
+            )
+        except InvalidPage as error:
+            raise Http404(str(error))
         return context
 
+    def get_cache_tags(self, context):
+        return [
+            *post_tags(self.object),
+            *(user_tag(comment.author_id) for comment in context['comments'])
+        ]
+
+
+class PostCommentsView(PostDetailView):
+    """Следующая порция комментариев к публикации в виде HTML-фрагмента
+    для подгрузки на странице публикации."""
+
+    template_name = 'includes/comment_list.html'
+
 
-class CategoryPostListView(SetMixin, generic.ListView):
+class CategoryPostListView(ConditionalGetMixin, PageCacheMixin, SetMixin,
+                           generic.ListView):
     template_name = 'blog/category.html'
 
+    def get_category(self):
+        if not hasattr(self, 'category'):
+            self.category = get_object_or_404(
+                Category,
+                slug=self.kwargs['category_slug'],
+                is_published=True
+            )
+        return self.category
+
+    def get_validators(self):
+        category = self.get_category()
+        if not self.is_first_page():
+            return None
+        return [category_feed(category.pk)], last_update()
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        self.category = get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True
-        )
-        return queryset.filter(
-            category=self.category
+        return super().get_queryset().filter(
+            category=self.get_category()
         )
 
+    def get_feed(self):
+        return category_feed(self.get_category().pk)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category
         return context
 
 
+class SearchView(SetMixin, generic.ListView):
+    """Полнотекстовый поиск по заголовкам и текстам видимых публикаций.
+    Результаты упорядочены по релевантности, поэтому всегда разбиваются
+    на страницы по номерам."""
+
+    template_name = 'blog/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return SearchResults(self.query)
+
+    def uses_cursor(self):
+        return False
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return Paginator(queryset, per_page, **kwargs)
+
+    def hydrate(self, object_list):
+        hits = list(object_list)
+        posts = Post.objects.select_related(
+            'category', 'author', 'location'
+        ).in_bulk([hit.pk for hit in hits])
+        results = []
+        for hit in hits:
+            post = posts.get(hit.pk)
+            if post is not None:
+                post.search_title = hit.title
+                post.search_snippet = hit.snippet
+                results.append(post)
+        return results
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        page_query = QueryDict(mutable=True)
+        page_query['q'] = self.query
+        context['page_query'] = page_query.urlencode() + '&'
+        return context
+
+
+class FeedView(ConditionalGetMixin, PageCacheMixin, generic.View):
+    """Лента RSS (или Atom, если передать feed_type=Atom1Feed в as_view())
+    для класса feed_class. Лента формируется один раз после каждого
+    изменения входящих в неё публикаций и затем отдаётся из кеша."""
+
+    feed_class = None
+    feed_type = Rss201rev2Feed
+
+    @property
+    def content_type(self):
+        return self.feed_type.content_type
+
+    def get_feed(self):
+        if not hasattr(self, 'feed'):
+            self.feed = self.feed_class()
+            self.feed.feed_type = self.feed_type
+        return self.feed
+
+    def get(self, request, *args, **kwargs):
+        return self.get_feed()(request, *args, **kwargs)
+
+    def get_validators(self):
+        feed = self.get_feed()
+        obj = feed.get_object(self.request, *self.args, **self.kwargs)
+        return [feed.get_feed_tag(obj)], last_update()
+
+    def get_cache_tags(self, context):
+        return self.feed.get_cache_tags()
+
+
 class PostCreateView(LoginRequiredMixin, generic.CreateView):
     model = Post
     form_class = PostForm
@@ -94,24 +225,43 @@ class PostDeleteView(LoginRequiredMixin, PostMixin, AuthorMixin,
         return reverse('blog:profile', args=(self.request.user.username,))
 
 
-class ProfileListView(SetMixin, generic.ListView):
+class ProfileListView(ConditionalGetMixin, PageCacheMixin, SetMixin,
+                      generic.ListView):
     template_name = 'blog/profile.html'
 
+    def get_profile(self):
+        if not hasattr(self, 'profile'):
+            self.profile = get_object_or_404(
+                User,
+                username=self.kwargs['username']
+            )
+            self.own = self.request.user.pk == self.profile.pk
+        return self.profile
+
+    def get_validators(self):
+        profile = self.get_profile()
+        if not self.is_first_page():
+            return None
+        return [
+            user_tag(profile.pk),
+            author_feed(profile.pk, own=self.own),
+        ], last_update()
+
     def get_queryset(self):
         queryset = super().get_queryset()
-        self.profile = get_object_or_404(
-            User,
-            username=self.kwargs['username']
-        )
-        if self.request.user.username != self.kwargs['username']:
+        self.get_profile()
+        if not self.own:
             return queryset.filter(
-                author__username=self.profile
+                author=self.profile
             )
-        return Post.objects.filter(
-            author__username=self.profile
-        ).annotate(comment_count=models.Count('comments')).order_by(
-            '-pub_date'
-        )
+        return Post.objects.select_related(
+            'category', 'author', 'location'
+        ).filter(
+            author=self.profile
+        ).order_by('-pub_date')
+
+    def get_feed(self):
+        return author_feed(self.profile.pk, own=self.own)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
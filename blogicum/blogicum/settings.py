@@ -106,8 +106,49 @@ LIMIT_MIN = 10
 LIMIT_MED = 50
 LIMIT_MAX = 256
 
+COMMENTS_PER_PAGE = 50
+FEED_ITEMS = 20
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Кеш страниц, карточек и меток должен быть общим для всех процессов:
+# сайта, планировщика, обработчика задач и команд импорта. По умолчанию
+# используется файловый кеш (один сервер); при нескольких серверах
+# укажите общий, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache и
+# CACHE_LOCATION=127.0.0.1:11211.
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    }
+}
+if CACHE_BACKEND.endswith('.FileBasedCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+CURSOR_PAGINATION = os.getenv('CURSOR_PAGINATION', 'False') == 'True'
+FEED_COUNT_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_TIMEOUT = 60 * 10
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+FEED_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv('FEED_COUNT_ESTIMATE_THRESHOLD', 10000)
+)
+
 MEDIA_ROOT = BASE_DIR / 'media'
 
+POST_IMAGE_WIDTHS = {
+    'card': 640,
+    'detail': 960,
+}
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 30
+JOB_LOCK_TIMEOUT = 60 * 10
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
@@ -0,0 +1,34 @@
+'use strict';
+// Подсказки для фильтров по началу значения в списках админки.
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('input[data-suggest-url]').forEach((input) => {
+    const list = document.getElementById(input.getAttribute('list'));
+    let timer = null;
+    let request = null;
+    input.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        if (request) {
+          request.abort();
+        }
+        const term = input.value.trim();
+        if (!term) {
+          list.replaceChildren();
+          return;
+        }
+        request = new AbortController();
+        const url = `${input.dataset.suggestUrl}?term=${encodeURIComponent(term)}`;
+        fetch(url, {signal: request.signal})
+          .then((response) => response.json())
+          .then((data) => {
+            list.replaceChildren(...data.results.map((value) => {
+              const option = document.createElement('option');
+              option.value = value;
+              return option;
+            }));
+          })
+          .catch(() => {});
+      }, 200);
+    });
+  });
+});
@@ -1,5 +1,8 @@
 import os
 import re
+import subprocess
+import sys
+import textwrap
 import time
 from http import HTTPStatus
 from inspect import getsource
@@ -19,6 +22,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -30,6 +34,17 @@ N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
 
+BLOGICUM_DIR = Path(__file__).resolve().parent.parent / "blogicum"
+FILE_CACHE = "django.core.cache.backends.filebased.FileBasedCache"
+PROCESS_SETUP = """
+import sys
+import django
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+settings.MEDIA_ROOT = sys.argv[2]
+django.setup()
+"""
+
 KeyVal = NamedTuple("KeyVal", [("key", Optional[str]), ("val", Optional[str])])
 UrlRepr = NamedTuple("UrlRepr", [("url", str), ("repr", str)])
 TitledUrlRepr = TypeVar("TitledUrlRepr", bound=Tuple[UrlRepr, str])
@@ -41,6 +56,25 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(scope="session", autouse=True)
+def test_cache(tmp_path_factory):
+    """Отдельный файловый кеш на время тестов: тесты очищают кеш и не
+    должны трогать кеш сайта, а процессы из run_in_process должны видеть
+    тот же кеш, что и тесты."""
+    location = str(tmp_path_factory.mktemp("cache"))
+    with override_settings(CACHES={
+        "default": {"BACKEND": FILE_CACHE, "LOCATION": location},
+    }):
+        yield location
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(test_cache):
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -367,3 +401,30 @@ def cleanup(request):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
                     os.remove(file_path)
+
+
+def run_in_process(tmp_path, code, *args):
+    """Выполняет code в отдельном процессе Django, как команды
+    планировщика или обработчика задач: с тем же кешем, что и тесты,
+    но со своей базой данных и файлами в tmp_path. Аргументы args
+    доступны в sys.argv[3:]."""
+    from django.conf import settings
+
+    result = subprocess.run(
+        [
+            sys.executable, "-c", PROCESS_SETUP + textwrap.dedent(code),
+            str(tmp_path / "db.sqlite3"), str(tmp_path / "media"),
+            *map(str, args),
+        ],
+        cwd=BLOGICUM_DIR,
+        env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "blogicum.settings",
+            "CACHE_BACKEND": FILE_CACHE,
+            "CACHE_LOCATION": settings.CACHES["default"]["LOCATION"],
+        },
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
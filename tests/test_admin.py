@@ -0,0 +1,208 @@
+import re
+
+import pytest
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.filters import (CategoryTitleFilter, LocationNameFilter, PostFilter,
+                          prefix_range)
+from blog.models import Comment, Post
+
+
+def _changelist_ids(admin_client, model, query):
+    response = admin_client.get(
+        f"/admin/blog/{model._meta.model_name}/", {"q": query}
+    )
+    return {obj.pk for obj in response.context["cl"].result_list}
+
+
+@pytest.mark.django_db
+def test_post_admin_search(admin_client, mixer, user):
+    by_title = mixer.blend("blog.Post", title="Горное озеро", text="...")
+    by_text = mixer.blend("blog.Post", title="Выходные", text="Были на озере")
+    by_author = mixer.blend("blog.Post", author=user, title="x", text="y")
+    mixer.blend("blog.Post", title="Город", text="Пробки")
+
+    assert _changelist_ids(admin_client, Post, "озеро") == {by_title.pk}
+    assert _changelist_ids(admin_client, Post, "озер") == {
+        by_title.pk, by_text.pk
+    }, "Убедитесь, что поиск в админке ищет по заголовку и тексту."
+    assert _changelist_ids(admin_client, Post, user.username) == {
+        by_author.pk
+    }, "Убедитесь, что поиск в админке находит публикации по автору."
+
+
+@pytest.mark.django_db
+def test_admin_search_without_fts(admin_client, mixer, user, monkeypatch):
+    monkeypatch.setattr("blog.admin.search_available", lambda: False)
+    by_title = mixer.blend("blog.Post", title="Горное озеро", text="...")
+    by_text = mixer.blend("blog.Post", title="Выходные", text="Были на озере")
+    by_author = mixer.blend("blog.Post", author=user, title="x", text="y")
+    assert _changelist_ids(admin_client, Post, "озер") == {
+        by_title.pk, by_text.pk
+    }, (
+        "Убедитесь, что без полнотекстовых индексов поиск в админке"
+        " работает по search_fields."
+    )
+    assert by_author.pk in _changelist_ids(
+        admin_client, Post, user.username[:-1]
+    )
+
+
+@pytest.mark.django_db
+def test_comment_admin_search(admin_client, mixer, user):
+    post = mixer.blend("blog.Post", title="Горное озеро")
+    on_post = mixer.blend("blog.Comment", post=post, text="Класс")
+    by_text = mixer.blend("blog.Comment", text="Где это озеро?")
+    by_author = mixer.blend("blog.Comment", author=user, text="Спасибо")
+
+    assert _changelist_ids(admin_client, Comment, "озеро") == {
+        on_post.pk, by_text.pk
+    }, (
+        "Убедитесь, что комментарии ищутся по тексту и заголовку"
+        " публикации."
+    )
+    assert _changelist_ids(admin_client, Comment, user.username) == {
+        by_author.pk
+    }
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN из SQLite"
+)
+@pytest.mark.django_db
+@pytest.mark.parametrize("model", (Post, Comment))
+def test_admin_search_uses_indexes(rf, admin_user, model):
+    request = rf.get("/")
+    request.user = admin_user
+    model_admin = site._registry[model]
+    assert model_admin.show_full_result_count is False
+    queryset, _ = model_admin.get_search_results(
+        request, model.objects.all(), "озеро"
+    )
+    plan = queryset.explain()
+    assert not re.search(rf"SCAN {model._meta.db_table}\b", plan), (
+        "Убедитесь, что поиск в админке не просматривает всю таблицу."
+        f" План запроса:\n{plan}"
+    )
+
+
+@pytest.mark.django_db
+def test_comment_admin_prefix_filters(admin_client, mixer):
+    anna, boris = (
+        mixer.blend("auth.User", username=name) for name in ("anna", "boris")
+    )
+    post = mixer.blend("blog.Post", title="Горное озеро")
+    by_anna = mixer.blend("blog.Comment", author=anna, post=post)
+    mixer.blend("blog.Comment", author=boris)
+
+    content = admin_client.get("/admin/blog/comment/").content.decode()
+    assert "author__id__exact" not in content, (
+        "Убедитесь, что фильтры списка комментариев не выводят всех"
+        " пользователей."
+    )
+    assert 'name="author"' in content and 'name="post"' in content
+    response = admin_client.get("/admin/blog/comment/", {"author": "an"})
+    assert {c.pk for c in response.context["cl"].result_list} == {by_anna.pk}
+    response = admin_client.get("/admin/blog/comment/", {"post": "Горн"})
+    assert {c.pk for c in response.context["cl"].result_list} == {by_anna.pk}
+
+    mixer.cycle(15).blend(
+        "auth.User", username=(f"anton{i:02}" for i in range(15))
+    )
+    results = admin_client.get(
+        "/admin/blog/comment/suggest/author/", {"term": "an"}
+    ).json()["results"]
+    assert results[:2] == ["anna", "anton00"] and len(results) == 10, (
+        "Убедитесь, что подсказки фильтра ограничены и отсортированы."
+    )
+    assert admin_client.get(
+        "/admin/blog/comment/suggest/text/", {"term": "a"}
+    ).status_code == 404
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN из SQLite"
+)
+@pytest.mark.django_db
+def test_prefix_filters_use_indexes():
+    for spec, index in (
+        (PostFilter, "post_title_idx"),
+        (CategoryTitleFilter, "category_title_idx"),
+        (LocationNameFilter, "location_name_idx"),
+    ):
+        plan = spec.model.objects.filter(
+            prefix_range(spec.field, "Гор")
+        ).order_by(spec.field).values_list(spec.field)[:10].explain()
+        assert index in plan, (
+            f"Убедитесь, что фильтр по началу значения использует индекс"
+            f" `{index}`. План запроса:\n{plan}"
+        )
+
+
+@pytest.mark.django_db
+def test_post_admin_comment_inline_is_paginated(
+    admin_client, mixer, django_assert_max_num_queries
+):
+    post = mixer.blend("blog.Post")
+    mixer.cycle(60).blend("blog.Comment", post=post)
+    url = f"/admin/blog/post/{post.pk}/change/"
+
+    with django_assert_max_num_queries(15):
+        response = admin_client.get(url)
+    formset = response.context["inline_admin_formsets"][0].formset
+    assert len(formset.forms) == 50, (
+        "Убедитесь, что комментарии на странице публикации в админке"
+        " выводятся постранично."
+    )
+    content = response.content.decode()
+    changelist = f"/admin/blog/comment/?post__id__exact={post.pk}"
+    assert changelist in content, (
+        "Убедитесь, что со страницы публикации есть ссылка на все её"
+        " комментарии."
+    )
+    assert admin_client.get(changelist).context["cl"].result_count == 60
+
+    response = admin_client.get(url, {"comments_page": 2})
+    formset = response.context["inline_admin_formsets"][0].formset
+    assert len(formset.forms) == 10
+
+
+def _count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        assert client.get(url).status_code == 200
+    return len(context)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("model_name", ("post", "comment"))
+def test_admin_changelist_query_count(admin_client, mixer, model_name):
+    url = f"/admin/blog/{model_name}/"
+    mixer.cycle(3).blend(
+        "blog.Comment", post__location__is_published=True
+    )
+    few = _count_queries(admin_client, url)
+    mixer.cycle(20).blend(
+        "blog.Comment", post__location__is_published=True
+    )
+    assert _count_queries(admin_client, url) == few, (
+        "Убедитесь, что число запросов списка в админке не зависит"
+        " от числа строк на странице."
+    )
+
+
+@pytest.mark.django_db
+def test_admin_changelists_render_excerpts(admin_client, mixer):
+    text = "Очень длинный текст. " * 100
+    post = mixer.blend("blog.Post", text=text)
+    comment = mixer.blend("blog.Comment", post=post, text=text)
+    assert post.excerpt == comment.excerpt
+    assert len(post.excerpt) == 256 and post.excerpt.endswith("…")
+    for model_name in ("post", "comment"):
+        content = admin_client.get(f"/admin/blog/{model_name}/").content
+        assert text.encode() not in content, (
+            "Убедитесь, что в списке админки выводится начало текста,"
+            " а не весь текст."
+        )
+        assert post.excerpt.encode() in content
@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+import pytz
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+
+PAST = datetime.now(tz=pytz.UTC) - timedelta(days=1)
+
+
+@pytest.fixture
+def posts(mixer, user, published_category, published_location):
+    return mixer.cycle(5).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=published_location,
+        pub_date=(PAST - timedelta(hours=hour) for hour in range(5)),
+        image="",
+    )
+
+
+@pytest.fixture
+def hidden_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=PAST,
+        is_published=False,
+        image="",
+    )
+
+
+def _get(client, url, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    return response, [query["sql"] for query in queries]
+
+
+@pytest.mark.django_db
+def test_post_list_pagination(client, posts, hidden_post):
+    url = "/api/v1/posts/"
+    response, queries = _get(client, url, limit=2, fields="id,title")
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "application/json"
+    data = response.json()
+    assert data["results"] == [
+        {"id": post.id, "title": post.title} for post in posts[:2]
+    ], (
+        "Убедитесь, что API отдаёт видимые публикации от новых к старым"
+        " только с полями из параметра fields."
+    )
+    assert data["previous"] is None and data["next"]
+    assert not any("OFFSET" in sql or "COUNT(" in sql for sql in queries), (
+        "Убедитесь, что API использует курсорную пагинацию без OFFSET"
+        " и COUNT(*)."
+    )
+    seen = [item["id"] for item in data["results"]]
+    while data["next"]:
+        data = client.get(data["next"]).json()
+        seen.extend(item["id"] for item in data["results"])
+    assert seen == [post.id for post in posts], (
+        "Убедитесь, что по ссылкам next можно пройти всю ленту,"
+        " и в ней нет скрытых публикаций."
+    )
+
+
+@pytest.mark.django_db
+def test_post_fields(client, posts):
+    response, queries = _get(client, "/api/v1/posts/", fields="id,title")
+    assert not any('"blog_post"."text"' in sql for sql in queries), (
+        "Убедитесь, что API выбирает из базы только запрошенные поля."
+    )
+    item = client.get("/api/v1/posts/").json()["results"][0]
+    assert "text" not in item and item["excerpt"] == posts[0].excerpt
+    assert item["author"] == posts[0].author.username
+    assert item["location"] == posts[0].location.name
+    response = client.get("/api/v1/posts/", {"fields": "id,password"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "password" in response.json()["error"]
+
+
+@pytest.mark.django_db
+def test_post_detail_visibility(
+        client, user_client, posts, hidden_post):
+    response = client.get(f"/api/v1/posts/{posts[0].id}/")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["text"] == posts[0].text
+    url = f"/api/v1/posts/{hidden_post.id}/"
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert "error" in response.json()
+    assert user_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что автор видит через API свою скрытую публикацию."
+    )
+    profile_url = f"/api/v1/profiles/{hidden_post.author.username}/posts/"
+    assert hidden_post.id not in [
+        item["id"] for item in client.get(profile_url).json()["results"]
+    ]
+    assert hidden_post.id in [
+        item["id"] for item in user_client.get(profile_url).json()["results"]
+    ]
+
+
+@pytest.mark.django_db
+def test_categories_and_comments(
+        client, posts, published_category, hidden_post):
+    data = client.get("/api/v1/categories/").json()
+    assert [item["slug"] for item in data["results"]] == [
+        published_category.slug
+    ]
+    url = f"/api/v1/categories/{published_category.slug}/posts/"
+    assert len(client.get(url).json()["results"]) == len(posts)
+    post = posts[0]
+    comments = [
+        Comment.objects.create(post=post, author=post.author, text=f"#{i}")
+        for i in range(3)
+    ]
+    data = client.get(
+        f"/api/v1/posts/{post.id}/comments/", {"limit": 2}
+    ).json()
+    assert [item["text"] for item in data["results"]] == ["#0", "#1"]
+    data = client.get(data["next"]).json()
+    assert [item["id"] for item in data["results"]] == [comments[2].id]
+    response = client.get(f"/api/v1/posts/{hidden_post.id}/comments/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_head_checks_object_exists(client, posts, hidden_post):
+    for url in (
+        "/api/v1/posts/9999/",
+        f"/api/v1/posts/{hidden_post.id}/",
+        "/api/v1/posts/9999/comments/",
+        "/api/v1/categories/nope/posts/",
+        "/api/v1/profiles/nobody/posts/",
+    ):
+        response = client.head(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f"Убедитесь, что HEAD-запрос к `{url}` для несуществующего"
+            " объекта возвращает 404."
+        )
+    response = client.head("/api/v1/posts/", {"fields": "nope"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_endpoints_have_own_validators(client, posts, published_category):
+    post = posts[0]
+    etag = client.get("/api/v1/posts/")["ETag"]
+    response = client.get("/api/v1/posts/9999/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что ETag ленты не даёт ответа 304 для"
+        " несуществующей публикации."
+    )
+    urls = (
+        f"/api/v1/posts/{post.id}/",
+        f"/api/v1/posts/{post.id}/comments/",
+        f"/api/v1/categories/{published_category.slug}/posts/",
+        f"/api/v1/profiles/{post.author.username}/posts/",
+    )
+    for url in urls:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что ETag ленты не подходит к `{url}`."
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+    etag = client.get(urls[0])["ETag"]
+    response = client.get(
+        f"/api/v1/posts/{posts[1].id}/", HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_cursor_beyond_feed(client, posts):
+    data = client.get("/api/v1/posts/", {"limit": 2}).json()
+    data = client.get(data["next"]).json()
+    Post.objects.all().delete()
+    for link in (data["previous"], data["next"]):
+        response = client.get(link)
+        assert response.status_code == HTTPStatus.OK, (
+            "Убедитесь, что курсор, за которым нет публикаций, даёт пустую"
+            " страницу, а не ошибку."
+        )
+        assert response.json() == {
+            "results": [], "next": None, "previous": None
+        }
@@ -0,0 +1,53 @@
+import pytest
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from blog.cache import set_card_versions
+from conftest import run_in_process
+
+
+@pytest.mark.django_db
+def test_post_card_fragment_cache(user_client, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.get("/")
+    cached_post = response.context["page_obj"][0]
+    key = make_template_fragment_key(
+        "post_card", [cached_post.id, cached_post.card_version]
+    )
+    assert cache.get(key), (
+        "Убедитесь, что карточка публикации кешируется как фрагмент шаблона."
+    )
+
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "Текст"})
+    content = user_client.get("/").content.decode()
+    assert "Комментарии (1)" in content, (
+        "Убедитесь, что кеш карточки сбрасывается при добавлении"
+        " комментария."
+    )
+
+    post.category.title = "Другая категория"
+    post.category.save()
+    assert "Другая категория" in user_client.get("/").content.decode(), (
+        "Убедитесь, что кеш карточки сбрасывается при изменении категории."
+    )
+
+
+@pytest.mark.django_db
+def test_card_version_follows_other_processes(
+        tmp_path, post_with_published_location):
+    post = post_with_published_location
+    set_card_versions([post])
+    version = post.card_version
+    run_in_process(
+        tmp_path,
+        """
+        from blog.cache import invalidate, post_tag
+        invalidate(post_tag(int(sys.argv[3])))
+        """,
+        post.id,
+    )
+    set_card_versions([post])
+    assert post.card_version != version, (
+        "Убедитесь, что версия карточки меняется, когда публикацию изменяет"
+        " другой процесс (обработчик задач, импорт): кеш должен быть общим."
+    )
@@ -0,0 +1,61 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for text in ("first", "second"):
+        user_client.post(f"/posts/{post.id}/comment/", data={"text": text})
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при создании комментария счётчик комментариев"
+        " публикации увеличивается."
+    )
+
+    Comment.objects.filter(post=post).first().delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что при удалении комментария счётчик комментариев"
+        " публикации уменьшается."
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_fixes_drift(comment_to_a_post):
+    post_id = comment_to_a_post.post_id
+    Post.objects.filter(pk=post_id).update(comment_count=42)
+    call_command("recount_comments", stdout=StringIO())
+    assert Post.objects.get(pk=post_id).comment_count == 1, (
+        "Убедитесь, что команда `recount_comments` исправляет расхождения"
+        " счётчика комментариев."
+    )
+
+
+@pytest.mark.django_db
+def test_post_save_keeps_comment_count(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "text"})
+    post.title = "changed"
+    post.save()
+    assert Post.objects.get(pk=post.pk).comment_count == 1, (
+        "Убедитесь, что сохранение публикации не перезаписывает счётчик"
+        " комментариев устаревшим значением."
+    )
+
+
+@pytest.mark.django_db
+def test_post_save_restores_deleted_row(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).delete()
+    post.save()
+    assert Post.objects.filter(pk=post.pk).exists(), (
+        "Убедитесь, что сохранение удалённой публикации вставляет её заново,"
+        " как обычное сохранение модели."
+    )
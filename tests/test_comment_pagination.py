@@ -0,0 +1,33 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from blog.models import Comment
+
+
+@pytest.mark.django_db
+@override_settings(COMMENTS_PER_PAGE=2)
+def test_comment_pagination(client, mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(5).blend(Comment, post=post)
+    response = client.get(f"/posts/{post.id}/")
+    first = response.context["comments"]
+    assert [c.id for c in first] == [c.id for c in comments[:2]], (
+        "Убедитесь, что страница публикации выводит только первую порцию"
+        " комментариев."
+    )
+    fragment_url = f"/posts/{post.id}/comments/?after={first.next_cursor}"
+    assert fragment_url in response.content.decode()
+
+    fragment = client.get(fragment_url)
+    assert fragment.status_code == HTTPStatus.OK
+    second = fragment.context["comments"]
+    assert [c.id for c in second] == [c.id for c in comments[2:4]], (
+        "Убедитесь, что фрагмент комментариев возвращает следующую порцию."
+    )
+    assert "<html" not in fragment.content.decode()
+
+    post.is_published = False
+    post.save()
+    assert client.get(fragment_url).status_code == HTTPStatus.NOT_FOUND
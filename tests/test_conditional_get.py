@@ -0,0 +1,180 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import index_feed, invalidate
+from blog.models import Category, Comment, Post
+
+
+def _validators(response):
+    return response["ETag"], response["Last-Modified"]
+
+
+@pytest.mark.django_db
+def test_not_modified_before_hydration(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for url in (
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    ):
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag, last_modified = _validators(response)
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что страница `{url}` отвечает 304 на запрос"
+            " с актуальным If-None-Match."
+        )
+        assert not response.templates and not any(
+            "blog_feedentry" in query["sql"] or "blog_comment" in query["sql"]
+            for query in queries
+        ), (
+            f"Убедитесь, что для ответа 304 на странице `{url}` не выбираются"
+            " ленты и комментарии и не рендерится шаблон."
+        )
+        response = user_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что страница `{url}` отвечает 304 на запрос"
+            " с актуальным If-Modified-Since."
+        )
+
+
+@pytest.mark.django_db
+def test_cached_page_not_modified_without_queries(
+        client, post_with_published_location):
+    etag, _ = _validators(client.get("/"))
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not queries, (
+        "Убедитесь, что для страницы из кеша ответ 304 отдаётся без"
+        " запросов к базе данных."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_changes_post_freshness(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    etag, _ = _validators(user_client.get(url))
+    updated_at = post.updated_at
+    comment = Comment.objects.create(
+        post=post, author=post.author, text="Новый комментарий"
+    )
+    post.refresh_from_db()
+    assert post.updated_at > updated_at, (
+        "Убедитесь, что новый комментарий обновляет поле `updated_at`"
+        " публикации."
+    )
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert "Новый комментарий" in response.content.decode()
+    etag, _ = _validators(response)
+    comment.delete()
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что удаление комментария меняет ETag публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_deleted_post_changes_feed_freshness(
+        client, post_with_published_location, post_with_another_category):
+    etag, _ = _validators(client.get("/"))
+    Post.objects.get(pk=post_with_another_category.pk).delete()
+    response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что удаление публикации меняет ETag ленты."
+    )
+    assert post_with_another_category.title not in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_head_skips_rendering(user_client, post_with_published_location):
+    post = post_with_published_location
+    for url in ("/", f"/posts/{post.id}/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.head(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header("ETag")
+        assert not response.content and not response.templates, (
+            f"Убедитесь, что HEAD-запрос к странице `{url}` не рендерит"
+            " шаблон."
+        )
+        assert not any(
+            "blog_feedentry" in query["sql"] or "blog_comment" in query["sql"]
+            for query in queries
+        )
+    response = user_client.head("/posts/100500/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_head_checks_page_exists(
+        client, user_client, post_with_published_location):
+    post = post_with_published_location
+    category = post.category
+    Category.objects.filter(pk=category.pk).update(
+        is_published=False
+    )
+    for url in (
+        "/category/nope/",
+        f"/category/{category.slug}/",
+        "/profile/nobody/",
+        "/?page=999",
+    ):
+        for method in (client.head, user_client.head):
+            response = method(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f"Убедитесь, что HEAD-запрос к несуществующей странице"
+                f" `{url}` возвращает 404."
+            )
+
+
+@pytest.mark.django_db
+def test_pages_have_own_validators(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    etag, _ = _validators(user_client.get("/"))
+    for url in (
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    ):
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что ETag главной страницы не подходит к"
+            f" странице `{url}`."
+        )
+        assert response["ETag"] != etag
+    response = user_client.get("/category/nope/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_index_tag_does_not_expire_other_pages(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    urls = (
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/category/{post.category.slug}/feed/",
+        f"/api/v1/categories/{post.category.slug}/posts/",
+        f"/api/v1/profiles/{post.author.username}/posts/",
+    )
+    etags = {url: user_client.get(url)["ETag"] for url in urls}
+    invalidate(index_feed())
+    for url, etag in etags.items():
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что ETag страницы `{url}` зависит от её собственных"
+            " меток, а не от метки главной ленты."
+        )
@@ -0,0 +1,62 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from blog.models import FeedEntry, Post
+from conftest import N_PER_PAGE
+
+
+@pytest.mark.django_db
+@override_settings(CURSOR_PAGINATION=True)
+def test_cursor_pagination(client, many_posts_with_published_locations):
+    response = client.get("/")
+    first = response.context["page_obj"]
+    assert len(first) == N_PER_PAGE and first.has_next(), (
+        "Убедитесь, что в курсорном режиме первая страница ленты содержит"
+        f" {N_PER_PAGE} публикаций и ссылку на следующую страницу."
+    )
+    assert not first.has_previous()
+    assert f"?after={first.next_cursor}" in response.content.decode(), (
+        "Убедитесь, что пагинатор выводит ссылку на следующую страницу"
+        " по курсору."
+    )
+
+    second = client.get(f"/?after={first.next_cursor}").context["page_obj"]
+    assert len(second) == N_PER_PAGE and not second.has_next()
+    posts = list(first) + list(second)
+    assert len({post.id for post in posts}) == len(
+        many_posts_with_published_locations
+    ), "Убедитесь, что курсорные страницы не пропускают и не повторяют посты."
+    keys = [(post.pub_date, post.id) for post in posts]
+    assert keys == sorted(keys, reverse=True)
+
+    back = client.get(f"/?before={second.previous_cursor}").context["page_obj"]
+    assert [post.id for post in back] == [post.id for post in first], (
+        "Убедитесь, что ссылка на предыдущую страницу возвращает к первой"
+        " странице ленты."
+    )
+
+    assert client.get("/?after=broken").status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@override_settings(CURSOR_PAGINATION=True)
+def test_cursor_beyond_feed(client, many_posts_with_published_locations):
+    first = client.get("/").context["page_obj"]
+    second = client.get(f"/?after={first.next_cursor}").context["page_obj"]
+    Post.objects.filter(
+        pk__in=[post.pk for post in first]
+    ).update(is_published=False)
+    FeedEntry.objects.filter(pk__in=[post.pk for post in first]).delete()
+    for url in (
+        f"/?before={second.previous_cursor}",
+        f"/?after={second.paginator.encode_cursor(second[-1])}",
+    ):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            "Убедитесь, что курсор, за которым нет публикаций, даёт пустую"
+            " страницу, а не ошибку."
+        )
+        page = response.context["page_obj"]
+        assert not list(page) and not page.has_other_pages()
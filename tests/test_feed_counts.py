@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+
+def _count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    counts = [q["sql"] for q in queries if "COUNT(" in q["sql"].upper()]
+    return response, counts
+
+
+@pytest.mark.django_db
+def test_feed_count_is_cached(client, many_posts_with_published_locations):
+    _, counts = _count_queries(client, "/")
+    assert counts, "Первый запрос ленты должен посчитать публикации."
+    _, counts = _count_queries(client, "/")
+    assert not counts, (
+        "Убедитесь, что количество публикаций ленты берётся из кеша."
+    )
+
+    post = many_posts_with_published_locations[0]
+    post.title = "changed"
+    post.save()
+    response, counts = _count_queries(client, "/")
+    assert counts, (
+        "Убедитесь, что кеш количества публикаций сбрасывается"
+        " при изменении публикации."
+    )
+    assert response.context["paginator"].count == len(
+        many_posts_with_published_locations
+    )
+
+
+@pytest.mark.django_db
+@override_settings(FEED_COUNT_ESTIMATE_THRESHOLD=N_PER_PAGE)
+def test_feed_count_estimate(client, many_posts_with_published_locations):
+    paginator = client.get("/").context["paginator"]
+    assert paginator.estimated and paginator.count == N_PER_PAGE
+    page = client.get("/?page=2").context["page_obj"]
+    assert len(page) == N_PER_PAGE, (
+        "Убедитесь, что при оценочном количестве публикаций страницы"
+        " за пределами оценки остаются доступными."
+    )
+    response = client.get(f"/?page={10 ** 9}")
+    assert response.status_code == 404, (
+        "Убедитесь, что пустая страница за пределами оценки возвращает 404."
+    )
@@ -0,0 +1,42 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import FeedEntry
+
+
+@pytest.mark.django_db
+def test_feed_entries_follow_posts(user_client, post_with_published_location):
+    post = post_with_published_location
+    entry = FeedEntry.objects.get(pk=post.pk)
+    assert (entry.pub_date, entry.category_id, entry.author_id) == (
+        post.pub_date, post.category_id, post.author_id
+    ), "Убедитесь, что видимая публикация попадает в материализованную ленту."
+
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "text"})
+    assert FeedEntry.objects.get(pk=post.pk).comment_count == 1
+
+    post.is_published = False
+    post.save()
+    assert not FeedEntry.objects.filter(pk=post.pk).exists(), (
+        "Убедитесь, что снятая с публикации запись удаляется из ленты."
+    )
+
+    post.is_published = True
+    post.save()
+    post.category.is_published = False
+    post.category.save()
+    assert not FeedEntry.objects.filter(pk=post.pk).exists(), (
+        "Убедитесь, что публикации снятой с публикации категории удаляются"
+        " из ленты."
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_feed(many_posts_with_published_locations):
+    FeedEntry.objects.all().delete()
+    call_command("rebuild_feed", batch_size=7, stdout=StringIO())
+    assert FeedEntry.objects.count() == len(
+        many_posts_with_published_locations
+    )
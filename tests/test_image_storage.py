@@ -0,0 +1,64 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.jobs import run_pending_jobs
+from blog.models import Post
+
+
+def _jpeg_bytes(color):
+    buffer = BytesIO()
+    Image.new("RGB", (700, 500), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.mark.django_db
+def test_identical_uploads_are_stored_once(mixer, published_category):
+    content = _jpeg_bytes("olive")
+    first, second = (
+        mixer.blend(
+            "blog.Post",
+            category=published_category,
+            image=SimpleUploadedFile(name, content, "image/jpeg"),
+        )
+        for name in ("a.JPG", "b.jpg")
+    )
+    digest = hashlib.sha256(content).hexdigest()
+    expected = f"posts_images/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    assert first.image.name == second.image.name == expected, (
+        "Убедитесь, что фото называются по хешу содержимого и одинаковые "
+        "загрузки хранятся в одном файле."
+    )
+    run_pending_jobs()
+    first.refresh_from_db()
+    for size in first.image_variants["variants"]["card"]:
+        assert size["name"].startswith("posts_images/")
+        assert size["name"].count("/") == 3
+
+
+@pytest.mark.django_db
+def test_rehash_post_images(mixer, published_category):
+    content = _jpeg_bytes("navy")
+    legacy = default_storage.save(
+        "posts_images/legacy.jpg", ContentFile(content)
+    )
+    post = mixer.blend("blog.Post", category=published_category, image="")
+    Post.objects.filter(pk=post.pk).update(image=legacy)
+
+    call_command("rehash_post_images", batch_size=1, delete_originals=True)
+
+    post.refresh_from_db()
+    digest = hashlib.sha256(content).hexdigest()
+    assert post.image.name == (
+        f"posts_images/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    )
+    assert post.image.storage.exists(post.image.name)
+    assert not default_storage.exists(legacy), (
+        "Убедитесь, что с --delete-originals старый файл удаляется."
+    )
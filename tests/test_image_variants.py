@@ -0,0 +1,204 @@
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from blog import jobs as blog_jobs
+from blog.jobs import claim_jobs, run_pending_jobs
+from blog.models import FeedEntry, Job, Post
+from conftest import run_in_process
+
+
+def _jpeg(width, height):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "teal").save(buffer, "JPEG")
+    return SimpleUploadedFile("photo.jpg", buffer.getvalue(), "image/jpeg")
+
+
+@pytest.mark.django_db
+def test_image_variants(client, mixer, published_category):
+    post = mixer.blend(
+        "blog.Post", category=published_category, image=_jpeg(3000, 2000)
+    )
+    content = client.get("/").content.decode()
+    assert "img/placeholder.svg" in content, (
+        "Убедитесь, что до обработки изображения выводится заглушка."
+    )
+    assert run_pending_jobs() == 1
+    variants = Post.objects.get(pk=post.pk).image_variants
+    assert (variants["width"], variants["height"]) == (3000, 2000)
+    assert [size["width"] for size in variants["variants"]["card"]] == [
+        640, 1280
+    ], "Убедитесь, что для карточки создаются копии в 1x и 2x."
+
+    content = client.get("/").content.decode()
+    card_image = Post.objects.get(pk=post.pk).card_image
+    assert f'srcset="{card_image.srcset}"' in content, (
+        "Убедитесь, что карточка публикации выводит srcset уменьшенных копий."
+    )
+    assert f'width="640" height="{card_image.height}"' in content
+    assert f'src="{post.image.url}"' not in content, (
+        "Убедитесь, что оригинал фото не используется как src карточки."
+    )
+
+
+@pytest.mark.django_db
+def test_small_image_is_not_upscaled(mixer, published_category):
+    post = mixer.blend(
+        "blog.Post", category=published_category, image=_jpeg(800, 600)
+    )
+    run_pending_jobs()
+    post.refresh_from_db()
+    card = post.image_variants["variants"]["card"]
+    assert [size["width"] for size in card] == [640, 800]
+    assert post.image_variants["variants"]["detail"][0]["width"] == 800
+
+
+@pytest.mark.django_db
+def test_image_job_is_retried(mixer, published_category, monkeypatch):
+    post = mixer.blend(
+        "blog.Post", category=published_category, image=_jpeg(800, 600)
+    )
+
+    def broken(image):
+        raise OSError("storage is down")
+
+    monkeypatch.setattr("blog.jobs.generate_variants", broken)
+    assert run_pending_jobs() == 1
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.PENDING, 1), (
+        "Убедитесь, что задача с ошибкой возвращается в очередь."
+    )
+    assert "storage is down" in job.error
+    assert run_pending_jobs() == 0, (
+        "Убедитесь, что повтор задачи откладывается."
+    )
+    post.refresh_from_db()
+    assert post.image_pending
+
+
+@pytest.mark.django_db
+def test_stale_jobs_count_as_attempts(mixer, published_category):
+    mixer.blend(
+        "blog.Post", category=published_category, image=_jpeg(800, 600)
+    )
+    job = Job.objects.get()
+    stale = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT + 1)
+    for attempt in range(1, settings.JOB_MAX_ATTEMPTS + 1):
+        Job.objects.update(status=Job.RUNNING, locked_at=stale)
+        claimed = claim_jobs(1)
+        job.refresh_from_db()
+        assert job.attempts == attempt, (
+            "Убедитесь, что зависшая задача, возвращённая в очередь,"
+            " считается попыткой."
+        )
+    assert not claimed and job.status == Job.FAILED, (
+        "Убедитесь, что задача, которая раз за разом роняет обработчик,"
+        " после JOB_MAX_ATTEMPTS попыток помечается ошибкой."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_job_is_enqueued_in_post_transaction(
+        mixer, published_category, monkeypatch):
+    def broken(kind, **payload):
+        raise RuntimeError("queue is down")
+
+    monkeypatch.setattr("blog.signals.enqueue", broken)
+    with pytest.raises(RuntimeError):
+        mixer.blend(
+            "blog.Post", category=published_category, image=_jpeg(800, 600)
+        )
+    assert not Post.objects.exists(), (
+        "Убедитесь, что публикация и задача обработки её фото записываются"
+        " в одной транзакции."
+    )
+
+
+@pytest.mark.django_db
+def test_job_process_resets_cached_pages(
+        client, tmp_path, post_with_published_location):
+    run_in_process(tmp_path, """
+        from io import BytesIO
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import call_command
+        from django.utils import timezone
+        from PIL import Image
+        from blog.models import Category, Post, User
+        call_command("migrate", verbosity=0)
+        buffer = BytesIO()
+        Image.new("RGB", (800, 600), "teal").save(buffer, "JPEG")
+        Post.objects.create(
+            title="С фото", text="Текст", pub_date=timezone.now(),
+            author=User.objects.create(username="author"),
+            category=Category.objects.create(
+                title="Категория", slug="category", is_published=True
+            ),
+            image=SimpleUploadedFile("photo.jpg", buffer.getvalue()),
+        )
+    """)
+    client.get("/")
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/")
+    assert not queries
+    output = run_in_process(tmp_path, """
+        from django.core.management import call_command
+        call_command("run_jobs", "--once")
+    """)
+    assert "Выполнено задач: 1" in output
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/")
+    assert queries, (
+        "Убедитесь, что фото, обработанные командой run_jobs в другом"
+        " процессе, сбрасывают кеш страниц сайта."
+    )
+
+
+@pytest.mark.django_db
+def test_job_keeps_concurrent_unpublish(
+        mixer, published_category, monkeypatch):
+    post = mixer.blend(
+        "blog.Post", category=published_category, image=_jpeg(800, 600)
+    )
+    generate = blog_jobs.generate_variants
+
+    def unpublish_while_resizing(image):
+        hidden = Post.objects.get(pk=post.pk)
+        hidden.is_published = False
+        hidden.save()
+        return generate(image)
+
+    monkeypatch.setattr(
+        "blog.jobs.generate_variants", unpublish_while_resizing
+    )
+    assert run_pending_jobs() == 1
+    post = Post.objects.get(pk=post.pk)
+    assert "variants" in post.image_variants
+    assert not post.is_visible and not FeedEntry.objects.filter(
+        pk=post.pk
+    ).exists(), (
+        "Убедитесь, что обработка фото не возвращает в ленту публикацию,"
+        " снятую с публикации во время обработки."
+    )
+
+
+@pytest.mark.django_db
+def test_partial_save_keeps_visibility(mixer, published_category):
+    post = mixer.blend("blog.Post", category=published_category, image="")
+    stale = Post.objects.get(pk=post.pk)
+    post.is_published = False
+    post.save()
+    stale.title = "Новый заголовок"
+    stale.save(update_fields=("title",))
+    stale = Post.objects.get(pk=post.pk)
+    assert stale.title == "Новый заголовок"
+    assert not stale.is_visible, (
+        "Убедитесь, что сохранение отдельных полей не пересчитывает"
+        " видимость по устаревшим значениям других полей."
+    )
@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from django.contrib.admin.models import DELETION, LogEntry
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import get_tag_versions, index_feed
+from blog.models import Category, Comment, FeedEntry, Post
+from blog.moderation import (delete_comments, delete_posts, move_posts,
+                             set_categories_published, set_posts_published)
+from blog.search import FTS_TABLE, COMMENT_FTS_TABLE
+
+PAST = datetime.now(tz=pytz.UTC) - timedelta(days=1)
+
+
+@pytest.fixture
+def posts(mixer, published_category):
+    return mixer.cycle(4).blend(
+        "blog.Post", category=published_category, pub_date=PAST, image=""
+    )
+
+
+def _statements(context, prefix):
+    return [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith(prefix)
+    ]
+
+
+def _fts_count(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_set_posts_published(posts):
+    version = get_tag_versions([index_feed()])[index_feed()]
+    with CaptureQueriesContext(connection) as context:
+        assert set_posts_published(Post.objects.all(), False) == 4
+    assert len(_statements(context, 'UPDATE "blog_post"')) == 1, (
+        "Убедитесь, что снятие с публикации выполняется одним UPDATE."
+    )
+    assert not Post.objects.filter(is_visible=True).exists()
+    assert not FeedEntry.objects.exists()
+    assert get_tag_versions([index_feed()])[index_feed()] != version, (
+        "Убедитесь, что массовое действие сбрасывает кеш лент."
+    )
+
+    set_posts_published(Post.objects.filter(is_published=False), True)
+    assert Post.objects.filter(is_visible=True).count() == 4, (
+        "Убедитесь, что выборка, отфильтрованная по изменяемому полю,"
+        " обрабатывается целиком."
+    )
+    assert FeedEntry.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_move_posts(posts, mixer):
+    hidden = mixer.blend("blog.Category", is_published=False)
+    move_posts(Post.objects.filter(pk__in=[posts[0].pk, posts[1].pk]), hidden)
+    assert set(FeedEntry.objects.values_list("pk", flat=True)) == {
+        posts[2].pk, posts[3].pk
+    }
+
+    shown = mixer.blend("blog.Category", is_published=True)
+    move_posts(Post.objects.all(), shown)
+    assert Post.objects.filter(is_visible=True, category=shown).count() == 4
+    assert set(FeedEntry.objects.values_list("category", flat=True)) == {
+        shown.pk
+    }
+
+
+@pytest.mark.django_db
+def test_delete_comments(posts, mixer):
+    mixer.cycle(3).blend("blog.Comment", post=posts[0])
+    kept, _ = mixer.cycle(2).blend("blog.Comment", post=posts[1])
+    with CaptureQueriesContext(connection) as context:
+        deleted = delete_comments(Comment.objects.exclude(pk=kept.pk))
+    assert deleted == 4
+    assert len(_statements(context, 'DELETE FROM "blog_comment"')) == 1
+    counts = dict(Post.objects.values_list("pk", "comment_count"))
+    assert (counts[posts[0].pk], counts[posts[1].pk]) == (0, 1), (
+        "Убедитесь, что после удаления комментариев счётчики уменьшаются."
+    )
+    assert FeedEntry.objects.get(pk=posts[1].pk).comment_count == 1
+    assert _fts_count(COMMENT_FTS_TABLE) == 1
+
+
+@pytest.mark.django_db
+def test_delete_posts(posts, mixer):
+    mixer.cycle(3).blend("blog.Comment", post=posts[0])
+    with CaptureQueriesContext(connection) as context:
+        assert delete_posts(Post.objects.filter(pk__lte=posts[1].pk)) == 2
+    assert len(_statements(context, 'DELETE FROM "blog_post"')) == 1
+    assert Post.objects.count() == 2
+    assert not Comment.objects.exists()
+    assert FeedEntry.objects.count() == 2
+    assert _fts_count(FTS_TABLE) == 2
+    assert _fts_count(COMMENT_FTS_TABLE) == 0
+
+
+@pytest.mark.django_db
+def test_set_categories_published(posts, published_category):
+    categories = Category.objects.filter(pk=published_category.pk)
+    set_categories_published(categories, False)
+    assert not Post.objects.filter(is_visible=True).exists()
+    assert not FeedEntry.objects.exists()
+    set_categories_published(categories, True)
+    assert FeedEntry.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_admin_actions_select_across(admin_client, posts, mixer):
+    mixer.cycle(2).blend("blog.Comment", post=posts[0])
+    url = "/admin/blog/post/?is_published__exact=1"
+    admin_client.post(url, {
+        "action": "unpublish", "select_across": "1", "index": "0",
+        "_selected_action": [posts[0].pk],
+    })
+    assert not Post.objects.filter(is_published=True).exists(), (
+        "Убедитесь, что действие применяется ко всем найденным публикациям."
+    )
+
+    data = {
+        "action": "delete_selected", "select_across": "1", "index": "0",
+        "_selected_action": [posts[0].pk],
+    }
+    response = admin_client.post("/admin/blog/post/", data)
+    content = response.content.decode()
+    assert Post.objects.count() == 4
+    assert 'name="select_across" value="1"' in content
+    admin_client.post("/admin/blog/post/", {**data, "post": "yes"})
+    assert not Post.objects.exists()
+    assert not Comment.objects.exists()
+    entries = LogEntry.objects.filter(action_flag=DELETION)
+    assert set(entries.values_list("object_id", flat=True)) == {
+        str(post.pk) for post in posts
+    }, (
+        "Убедитесь, что массовое удаление записывается в журнал админки"
+        " по записи на удалённый объект."
+    )
+
+
+@pytest.mark.django_db
+def test_admin_comment_delete_is_logged(admin_client, posts, mixer):
+    comments = mixer.cycle(3).blend("blog.Comment", post=posts[0])
+    admin_client.post("/admin/blog/comment/", {
+        "action": "delete_selected", "post": "yes",
+        "_selected_action": [comment.pk for comment in comments[:2]],
+    })
+    assert Comment.objects.count() == 1
+    assert sorted(
+        LogEntry.objects.values_list("object_repr", flat=True)
+    ) == sorted(str(comment) for comment in comments[:2])
+
+
+@pytest.mark.django_db
+def test_delete_comments_with_drifted_count(posts, mixer):
+    comments = mixer.cycle(2).blend("blog.Comment", post=posts[0])
+    Post.objects.filter(pk=posts[0].pk).update(comment_count=1)
+    FeedEntry.objects.filter(pk=posts[0].pk).update(comment_count=0)
+    assert delete_comments(
+        Comment.objects.filter(pk__in=[c.pk for c in comments])
+    ) == 2
+    assert Post.objects.get(pk=posts[0].pk).comment_count == 0, (
+        "Убедитесь, что разошедшийся счётчик комментариев не уходит ниже"
+        " нуля при массовом удалении."
+    )
+    assert FeedEntry.objects.get(pk=posts[0].pk).comment_count == 0
+
+
+@pytest.mark.django_db
+def test_admin_delete_from_search_results(admin_client, posts, mixer):
+    post = posts[0]
+    post.title = "Утро у озера"
+    post.save()
+    comment = mixer.blend("blog.Comment", post=posts[1], text="Тихая река")
+    mixer.blend("blog.Comment", post=posts[1], text="Другой комментарий")
+    admin_client.post("/admin/blog/comment/?q=река", {
+        "action": "delete_selected", "post": "yes",
+        "select_across": "1", "index": "0",
+        "_selected_action": [comment.pk],
+    })
+    assert not Comment.objects.filter(pk=comment.pk).exists(), (
+        "Убедитесь, что удаление из результатов поиска в админке удаляет"
+        " найденные комментарии."
+    )
+    assert Post.objects.get(pk=posts[1].pk).comment_count == 1
+    assert FeedEntry.objects.get(pk=posts[1].pk).comment_count == 1
+
+    admin_client.post("/admin/blog/post/?q=озера", {
+        "action": "delete_selected", "post": "yes",
+        "select_across": "1", "index": "0",
+        "_selected_action": [post.pk],
+    })
+    assert not Post.objects.filter(pk=post.pk).exists(), (
+        "Убедитесь, что удаление из результатов поиска в админке удаляет"
+        " найденные публикации."
+    )
+    assert Post.objects.count() == 3
+    assert list(
+        LogEntry.objects.filter(action_flag=DELETION).values_list(
+            "object_id", flat=True
+        ).order_by("object_id")
+    ) == sorted([str(comment.pk), str(post.pk)])
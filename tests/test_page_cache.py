@@ -0,0 +1,147 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def _queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(
+        client, post_with_published_location, post_with_another_category):
+    post = post_with_published_location
+    urls = (
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/category/{post_with_another_category.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    for url in urls:
+        _queries(client, url)
+    for url in urls:
+        response, n_queries = _queries(client, url)
+        assert n_queries == 0, (
+            f"Убедитесь, что страница `{url}` для анонимного пользователя"
+            " отдаётся из кеша без запросов к базе данных."
+        )
+
+    post.title = "Новый заголовок"
+    post.save()
+    response, n_queries = _queries(client, f"/posts/{post.id}/")
+    assert n_queries and "Новый заголовок" in response.content.decode(), (
+        "Убедитесь, что кеш страницы публикации сбрасывается при её"
+        " изменении."
+    )
+    assert "Новый заголовок" in client.get("/").content.decode()
+    _, n_queries = _queries(
+        client, f"/category/{post_with_another_category.category.slug}/"
+    )
+    assert n_queries == 0, (
+        "Убедитесь, что изменение публикации не сбрасывает кеш лент,"
+        " в которые она не входит."
+    )
+
+
+@pytest.mark.django_db
+def test_logged_in_pages_are_not_cached(
+        user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    _queries(user_client, url)
+    _, n_queries = _queries(user_client, url)
+    assert n_queries, (
+        "Убедитесь, что страницы авторизованных пользователей не кешируются."
+    )
+
+
+@pytest.mark.django_db
+def test_unknown_query_params_share_cache_entry(
+        client, post_with_published_location):
+    _queries(client, "/")
+    _queries(client, "/?page=1&b=2")
+    for url in ("/?utm_source=mail", "/?a=1&page=1", "/?page=1&c=3"):
+        _, n_queries = _queries(client, url)
+        assert n_queries == 0, (
+            "Убедитесь, что ключ кеша страницы учитывает только параметры"
+            " запроса, которые читает представление."
+        )
+
+
+@pytest.mark.django_db
+def test_user_and_location_changes_are_targeted(
+        client, mixer, post_with_published_location):
+    post = post_with_published_location
+    _queries(client, "/")
+    user = mixer.blend("auth.User")
+    user.first_name = "Новое имя"
+    user.save()
+    location = mixer.blend("blog.Location", is_published=True)
+    location.name = "Новое место"
+    location.save()
+    _, n_queries = _queries(client, "/")
+    assert n_queries == 0, (
+        "Убедитесь, что изменения пользователей и мест, которых нет на"
+        " странице, не сбрасывают её кеш."
+    )
+    post.location.name = "Переименованное место"
+    post.location.save()
+    response, n_queries = _queries(client, "/")
+    assert n_queries and "Переименованное место" in response.content.decode()
+    post.author.username = "renamed_author"
+    post.author.save()
+    response, n_queries = _queries(client, "/")
+    assert n_queries and "renamed_author" in response.content.decode(), (
+        "Убедитесь, что изменение автора сбрасывает кеш страниц с его"
+        " публикациями."
+    )
+
+
+@pytest.mark.django_db
+def test_commenter_rename_resets_post_page(
+        client, user_client, mixer, post_with_published_location):
+    post = post_with_published_location
+    commenter = mixer.blend("auth.User", username="old_name")
+    mixer.blend("blog.Comment", post=post, author=commenter)
+    url = f"/posts/{post.id}/"
+    _queries(client, url)
+    etag = user_client.get(url)["ETag"]
+    commenter.username = "new_name"
+    commenter.save()
+    response, n_queries = _queries(client, url)
+    assert n_queries and "@new_name" in response.content.decode(), (
+        "Убедитесь, что переименование комментатора сбрасывает кеш"
+        " страницы публикации."
+    )
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что переименование комментатора меняет ETag страницы"
+        " публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_hidden_post_changes_keep_feed_cache(
+        client, mixer, post_with_published_location):
+    post = post_with_published_location
+    _queries(client, "/")
+    draft = mixer.blend(
+        "blog.Post", author=post.author, category=post.category,
+        is_published=False, image=""
+    )
+    draft.title = "Черновик"
+    draft.save()
+    draft.delete()
+    _, n_queries = _queries(client, "/")
+    assert n_queries == 0, (
+        "Убедитесь, что изменения публикаций, которые не были и не стали"
+        " видимыми, не сбрасывают кеш главной страницы."
+    )
+    post.is_published = False
+    post.save()
+    response, n_queries = _queries(client, "/")
+    assert n_queries and post.title not in response.content.decode()
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+def test_post_detail_queries(client, another_user_client, comment_to_a_post):
+    post = comment_to_a_post.post
+    url = f"/posts/{post.id}/"
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    post_queries = [q for q in queries if 'FROM "blog_post"' in q["sql"]]
+    assert len(post_queries) == 1 and len(queries) == 2, (
+        "Убедитесь, что страница публикации загружает публикацию вместе с"
+        " категорией, местоположением и автором одним запросом."
+    )
+
+    post.is_published = False
+    post.save()
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    assert another_user_client.get(url).status_code == HTTPStatus.NOT_FOUND
+    author_client = Client()
+    author_client.force_login(post.author)
+    assert author_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что автор видит свою снятую с публикации запись."
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url", ["/posts/{post}/edit_comment/{comment}/",
+            "/posts/{post}/delete_comment/{comment}/"]
+)
+def test_comment_author_views_fetch_once(comment_to_a_post, url):
+    comment = comment_to_a_post
+    client = Client()
+    client.force_login(comment.author)
+    url = url.format(post=comment.post_id, comment=comment.id)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    comment_queries = [
+        q for q in queries if 'FROM "blog_comment"' in q["sql"]
+    ]
+    assert len(comment_queries) == 1, (
+        "Убедитесь, что комментарий загружается один раз за запрос."
+    )
+    assert client.get(
+        f"/posts/{comment.post_id + 1000}/edit_comment/{comment.id}/"
+    ).status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что комментарий ищется только среди комментариев"
+        " публикации из адреса."
+    )
@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from blog.services import next_scheduled
+from blog.views import CategoryPostListView, IndexListView, ProfileListView
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN из SQLite"
+)
+
+
+def _view_queryset(view_class, user, **kwargs):
+    request = RequestFactory().get("/")
+    request.user = user
+    view = view_class()
+    view.setup(request, **kwargs)
+    return view.get_queryset()
+
+
+def _assert_uses_index(queryset, index_name):
+    plan = queryset.explain()
+    assert index_name in plan, (
+        f"Убедитесь, что запрос использует индекс `{index_name}`, а не"
+        f" полный просмотр таблицы. План запроса:\n{plan}"
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("view_class", "kwargs", "own", "index_name"),
+    [
+        (IndexListView, lambda post: {}, False, "feed_pub_date_idx"),
+        (
+            CategoryPostListView,
+            lambda post: {"category_slug": post.category.slug},
+            False,
+            "feed_category_idx",
+        ),
+        (
+            ProfileListView,
+            lambda post: {"username": post.author.username},
+            False,
+            "feed_author_idx",
+        ),
+        (
+            ProfileListView,
+            lambda post: {"username": post.author.username},
+            True,
+            "post_author_pub_date_idx",
+        ),
+    ],
+    ids=["index", "category", "profile", "own profile"],
+)
+def test_feed_query_plans(
+        post_with_published_location, another_user, view_class, kwargs, own,
+        index_name):
+    post = post_with_published_location
+    user = post.author if own else another_user
+    queryset = _view_queryset(view_class, user, **kwargs(post))
+    _assert_uses_index(queryset[:10], index_name)
+
+
+@pytest.mark.django_db
+def test_comments_query_plan(comment_to_a_post):
+    _assert_uses_index(
+        comment_to_a_post.post.comments.select_related("author"),
+        "comment_post_created_idx",
+    )
+
+
+@pytest.mark.django_db
+def test_scheduled_query_plan(post_with_published_location):
+    with CaptureQueriesContext(connection) as queries:
+        assert next_scheduled() is None
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {queries[-1]['sql']}")
+        plan = "\n".join(str(row) for row in cursor.fetchall())
+    assert "post_scheduled_idx" in plan, (
+        "Убедитесь, что запрос next_scheduled() использует индекс"
+        f" `post_scheduled_idx`. План запроса:\n{plan}"
+    )
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+from blog.services import next_scheduled, publish_scheduled
+from conftest import run_in_process
+
+
+@pytest.mark.django_db
+def test_scheduled_post_becomes_visible(client, mixer, published_category):
+    pub_date = timezone.now() + timedelta(hours=1)
+    post = mixer.blend(
+        "blog.Post", category=published_category, pub_date=pub_date
+    )
+    assert not post.is_visible
+    assert post.title not in client.get("/").content.decode()
+    assert next_scheduled() == pub_date
+
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    assert publish_scheduled() == 1
+    assert Post.objects.get(pk=post.pk).is_visible
+    assert post.title in client.get("/").content.decode(), (
+        "Убедитесь, что наступившая отложенная публикация появляется в"
+        " ленте, а кеш ленты сбрасывается."
+    )
+
+
+@pytest.mark.django_db
+def test_unpublished_category_hides_posts(post_with_published_location):
+    category = post_with_published_location.category
+    assert Post.objects.get(pk=post_with_published_location.pk).is_visible
+    category.is_published = False
+    category.save()
+    assert not Post.objects.get(pk=post_with_published_location.pk).is_visible
+    category.is_published = True
+    category.save()
+    assert Post.objects.get(pk=post_with_published_location.pk).is_visible
+
+
+def _index_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/")
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_scheduler_process_resets_cached_pages(
+        client, tmp_path, post_with_published_location):
+    run_in_process(tmp_path, """
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        from blog.models import Category, Post, User
+        call_command("migrate", verbosity=0)
+        Post.objects.create(
+            title="Отложенная", text="Текст",
+            author=User.objects.create(username="author"),
+            category=Category.objects.create(
+                title="Категория", slug="category", is_published=True
+            ),
+            pub_date=timezone.now() + timedelta(hours=1),
+        )
+    """)
+    client.get("/")
+    assert _index_queries(client) == 0
+    output = run_in_process(tmp_path, """
+        from django.core.management import call_command
+        from django.utils import timezone
+        from blog.models import Post
+        Post.objects.update(pub_date=timezone.now())
+        call_command("publish_scheduled")
+    """)
+    assert "Опубликовано: 1" in output
+    assert _index_queries(client), (
+        "Убедитесь, что публикация отложенных записей командой"
+        " publish_scheduled в другом процессе сбрасывает кеш страниц сайта."
+    )
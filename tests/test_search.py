@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+import pytest
+import pytz
+from django.core.management import call_command
+from django.db import connection
+
+from blog.search import match_expression
+
+PAST = datetime.now(tz=pytz.UTC) - timedelta(days=1)
+
+
+def _post(mixer, category, **kwargs):
+    kwargs.setdefault("is_published", True)
+    return mixer.blend(
+        "blog.Post", category=category, pub_date=PAST, image="", **kwargs
+    )
+
+
+def _search(client, query):
+    response = client.get("/search/", {"q": query})
+    return [post.pk for post in response.context["page_obj"]], response
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_highlights(client, mixer, published_category):
+    in_text = _post(
+        mixer, published_category,
+        title="Заметки", text="Видели <b>северное</b> сияние над озером.",
+    )
+    in_title = _post(
+        mixer, published_category,
+        title="Северное сияние", text="Фотографии с прошлой ночи.",
+    )
+    hidden = _post(
+        mixer, published_category,
+        title="Северное сияние в черновике", text="", is_published=False,
+    )
+
+    found, response = _search(client, "северное сияние")
+    assert found == [in_title.pk, in_text.pk], (
+        "Убедитесь, что поиск находит только видимые публикации и ставит"
+        " совпадения в заголовке выше."
+    )
+    assert hidden.pk not in found
+    content = response.content.decode()
+    assert "<mark>сияние</mark>" in content, (
+        "Убедитесь, что найденные слова подсвечиваются в сниппете."
+    )
+    assert "<b>" not in content, (
+        "Убедитесь, что текст публикации в сниппете экранируется."
+    )
+
+
+@pytest.mark.django_db
+def test_search_index_follows_posts(client, mixer, published_category):
+    post = _post(mixer, published_category, title="Старое", text="Текст")
+    assert _search(client, "старое")[0] == [post.pk]
+
+    post.title = "Новое"
+    post.save()
+    assert _search(client, "старое")[0] == []
+    assert _search(client, "нов")[0] == [post.pk], (
+        "Убедитесь, что последнее слово запроса ищется по префиксу."
+    )
+
+    post.delete()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM blog_post_fts")
+        assert cursor.fetchone()[0] == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index(client, mixer, published_category):
+    posts = [
+        _post(mixer, published_category, title=f"Пост {i}", text="Озеро")
+        for i in range(5)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM blog_post_fts")
+    call_command("rebuild_search_index", batch_size=2, stdout=StringIO())
+    assert sorted(_search(client, "озеро")[0]) == sorted(
+        post.pk for post in posts
+    )
+
+
+def test_match_expression_escapes_operators():
+    assert match_expression('NOT "a" OR b*') == '"not" "a" "or" "b"*'
+    assert match_expression("  --  ") == ""
@@ -0,0 +1,78 @@
+import io
+from datetime import datetime
+
+import pytest
+import pytz
+from django.core.management import call_command
+from django.db.models import Count, Sum
+
+from blog.models import Category, Comment, FeedEntry, Location, Post, User
+
+ARGS = (
+    "--users", "30", "--categories", "10", "--locations", "10",
+    "--posts", "300", "--comments", "2000", "--batch-size", "128",
+    "--seed", "7",
+)
+
+
+def _snapshot():
+    return (
+        list(User.objects.order_by("pk").values_list("username", flat=True)),
+        list(Category.objects.order_by("pk").values_list(
+            "slug", "title", "is_published"
+        )),
+        list(Post.objects.order_by("pk").values_list(
+            "title", "author", "category", "location", "is_published"
+        )),
+        list(Comment.objects.order_by("pk").values_list(
+            "post", "author", "text"
+        )),
+    )
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic():
+    out = io.StringIO()
+    call_command("seed_blog", *ARGS, stdout=out)
+    assert "записей/с" in out.getvalue()
+    first = _snapshot()
+    User.objects.all().delete()
+    Category.objects.all().delete()
+    Location.objects.all().delete()
+    call_command(
+        "seed_blog", *ARGS, "--skip-search-index", stdout=io.StringIO()
+    )
+    assert _snapshot() == first, (
+        "Убедитесь, что seed_blog с тем же --seed на пустой базе создаёт"
+        " те же данные."
+    )
+
+
+@pytest.mark.django_db
+def test_seed_distributions():
+    call_command("seed_blog", *ARGS, stdout=io.StringIO())
+    assert (
+        User.objects.count(), Category.objects.count(),
+        Post.objects.count(), Comment.objects.count()
+    ) == (30, 10, 300, 2000)
+    now = datetime.now(tz=pytz.UTC)
+    assert Post.objects.filter(pub_date__gt=now).exists()
+    assert Post.objects.filter(is_published=False).exists()
+    per_author = sorted(
+        User.objects.annotate(written=Count("posts")).values_list(
+            "written", flat=True
+        ),
+        reverse=True,
+    )
+    assert per_author[0] > 3 * per_author[len(per_author) // 2], (
+        "Убедитесь, что несколько авторов пишут большую часть публикаций."
+    )
+    assert not Comment.objects.exclude(
+        post__in=FeedEntry.objects.values("pk")
+    ).exists(), "Комментарии должны быть только у видимых публикаций."
+    assert Post.objects.aggregate(
+        total=Sum("comment_count")
+    )["total"] == 2000, "Убедитесь, что счётчики комментариев пересчитаны."
+    assert FeedEntry.objects.count() == Post.objects.filter(
+        is_visible=True
+    ).count() > 0
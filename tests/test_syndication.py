@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def _get(client, url, **extra):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, **extra)
+    return response, [query["sql"] for query in queries]
+
+
+@pytest.mark.django_db
+def test_feeds(
+        client, post_with_published_location,
+        unpublished_posts_with_published_locations):
+    post = post_with_published_location
+    urls = (
+        "/feed/",
+        f"/category/{post.category.slug}/feed/",
+        f"/profile/{post.author.username}/feed/",
+    )
+    for url in urls:
+        for feed_url, content_type in (
+            (url, "application/rss+xml"),
+            (url + "atom/", "application/atom+xml"),
+        ):
+            response, queries = _get(client, feed_url)
+            assert response.status_code == HTTPStatus.OK
+            assert response["Content-Type"].startswith(content_type)
+            content = response.content.decode()
+            assert post.title in content and post.excerpt in content, (
+                f"Убедитесь, что лента `{feed_url}` содержит заголовок"
+                " и начало текста видимой публикации."
+            )
+            assert not any(
+                unpublished.title in content
+                for unpublished in unpublished_posts_with_published_locations
+            ), f"Убедитесь, что в ленте `{feed_url}` нет скрытых публикаций."
+            assert not any('"blog_post"."text"' in sql for sql in queries), (
+                f"Убедитесь, что лента `{feed_url}` не загружает полный текст"
+                " публикаций."
+            )
+
+
+@pytest.mark.django_db
+def test_feed_is_cached(client, post_with_published_location):
+    post = post_with_published_location
+    response, _ = _get(client, "/feed/")
+    etag = response["ETag"]
+    response, queries = _get(client, "/feed/")
+    assert response.status_code == HTTPStatus.OK and not queries, (
+        "Убедитесь, что лента отдаётся из кеша без запросов к базе данных."
+    )
+    assert response["ETag"] == etag
+    response, queries = _get(client, "/feed/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED and not queries
+
+    post.title = "Новый заголовок"
+    post.save()
+    response, queries = _get(client, "/feed/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что изменение публикации меняет ETag ленты."
+    )
+    assert "Новый заголовок" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_missing_feed_objects(client):
+    assert client.get("/category/missing/feed/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert client.get("/profile/missing/feed/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+@pytest.mark.django_db
+def test_feeds_have_own_validators(client, post_with_published_location):
+    post = post_with_published_location
+    urls = (
+        "/feed/",
+        "/feed/atom/",
+        f"/category/{post.category.slug}/feed/",
+        f"/category/{post.category.slug}/feed/atom/",
+        f"/profile/{post.author.username}/feed/",
+        f"/profile/{post.author.username}/feed/atom/",
+    )
+    etags = [client.head(url)["ETag"] for url in urls]
+    assert len(set(etags)) == len(urls), (
+        "Убедитесь, что у каждой ленты (и у RSS и Atom одной ленты)"
+        " свой ETag."
+    )
+    for url in urls[2:]:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etags[0])
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_head_missing_feed_objects(client):
+    for url in (
+        "/category/missing/feed/",
+        "/category/missing/feed/atom/",
+        "/profile/missing/feed/",
+    ):
+        assert client.head(url).status_code == HTTPStatus.NOT_FOUND, (
+            f"Убедитесь, что HEAD-запрос к ленте `{url}` несуществующего"
+            " объекта возвращает 404."
+        )
@@ -0,0 +1,236 @@
+import io
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+import pytz
+from django.core.management import CommandError, call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from blog import transfer
+from blog.cache import get_tag_versions, post_tag
+from blog.models import (Category, Comment, FeedEntry, Job, Location, Post,
+                         User)
+from blog.search import FTS_TABLE
+
+DB_JSON = Path(__file__).resolve().parent.parent / "blogicum" / "db.json"
+PAST = datetime.now(tz=pytz.UTC) - timedelta(days=1)
+
+
+def _indexes():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name LIKE 'blog_%'"
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def test_json_array_is_read_incrementally(monkeypatch):
+    monkeypatch.setattr(transfer, "READ_SIZE", 7)
+    with open(DB_JSON, encoding="utf-8") as file:
+        records = list(transfer.read_records(file, transfer.JSON))
+    with open(DB_JSON, encoding="utf-8") as file:
+        assert records == json.load(file)
+    with pytest.raises(ValueError):
+        list(transfer.read_records(io.StringIO('[{"a": 1},'), "json"))
+
+
+@pytest.mark.django_db
+def test_import_db_json():
+    indexes = _indexes()
+    out = io.StringIO()
+    call_command("import_blog", str(DB_JSON), stdout=out)
+    assert (
+        Post.objects.count(), Category.objects.count(),
+        Location.objects.count(), User.objects.count()
+    ) == (39, 6, 12, 4), "Убедитесь, что import_blog загружает db.json."
+    assert "записей/с" in out.getvalue() and "admin.logentry" in out.getvalue()
+    assert _indexes() == indexes, (
+        "Убедитесь, что после импорта индексы таблиц восстановлены."
+    )
+    visible = Post.objects.filter(
+        is_published=True, category__is_published=True,
+        pub_date__lte=datetime.now(tz=pytz.UTC)
+    )
+    assert set(FeedEntry.objects.values_list("pk", flat=True)) == set(
+        visible.values_list("pk", flat=True)
+    ), "Убедитесь, что после импорта лента и видимость пересчитаны."
+    post = Post.objects.get(pk=1)
+    assert post.excerpt and post.excerpt in post.text
+    assert post.created_at == datetime(
+        2022, 12, 18, 23, 6, 18, 993000, tzinfo=pytz.UTC
+    ), "Убедитесь, что импорт сохраняет время создания из дампа."
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        assert cursor.fetchone()[0] == 39
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", ("dump.ndjson", "dump.json.gz"))
+def test_export_import_round_trip(mixer, tmp_path, name):
+    category = mixer.blend("blog.Category", is_published=True)
+    posts = mixer.cycle(3).blend(
+        "blog.Post", category=category, pub_date=PAST, image=""
+    )
+    for post in posts[:2]:
+        mixer.cycle(2).blend("blog.Comment", post=post, author=post.author)
+    expected = list(
+        Post.objects.order_by("pk").values_list("pk", "title", "text")
+    )
+    path = tmp_path / name
+    call_command(
+        "export_blog", "-o", str(path), "--batch-size", "2",
+        stderr=io.StringIO()
+    )
+    User.objects.all().delete()
+    Category.objects.all().delete()
+    assert not Post.objects.exists()
+
+    call_command(
+        "import_blog", str(path), "--batch-size", "2", "--chunk-size", "5",
+        stdout=io.StringIO()
+    )
+    assert list(
+        Post.objects.order_by("pk").values_list("pk", "title", "text")
+    ) == expected
+    assert Comment.objects.count() == 4
+    assert sorted(
+        Post.objects.values_list("comment_count", flat=True)
+    ) == [0, 2, 2], "Убедитесь, что счётчики комментариев пересчитаны."
+    assert FeedEntry.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_import_keeps_timestamps(mixer, tmp_path):
+    category = mixer.blend("blog.Category", is_published=True)
+    post = mixer.blend("blog.Post", category=category, pub_date=PAST, image="")
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    # Фикстуры Django хранят время с точностью до миллисекунд.
+    stored = datetime(2022, 12, 18, 23, 6, 18, 993000, tzinfo=pytz.UTC)
+    for days, comment in enumerate(comments, start=1):
+        Comment.objects.filter(pk=comment.pk).update(
+            created_at=stored - timedelta(days=days)
+        )
+    Category.objects.update(
+        created_at=stored - timedelta(days=10),
+        updated_at=stored - timedelta(days=9)
+    )
+    Post.objects.update(
+        created_at=stored - timedelta(days=8),
+        updated_at=stored - timedelta(days=7)
+    )
+    fields = {
+        Category: ("pk", "created_at", "updated_at"),
+        Post: ("pk", "created_at", "updated_at"),
+        Comment: ("pk", "created_at"),
+    }
+    expected = {
+        model: list(model.objects.order_by("pk").values_list(*names))
+        for model, names in fields.items()
+    }
+    path = tmp_path / "dump.ndjson"
+    call_command("export_blog", "-o", str(path), stderr=io.StringIO())
+    User.objects.all().delete()
+    Category.objects.all().delete()
+
+    call_command("import_blog", str(path), stdout=io.StringIO())
+    for model, names in fields.items():
+        assert list(
+            model.objects.order_by("pk").values_list(*names)
+        ) == expected[model], (
+            f"Убедитесь, что импорт сохраняет время создания и изменения"
+            f" из дампа ({model._meta.label})."
+        )
+    assert list(
+        Comment.objects.order_by("created_at").values_list("pk", flat=True)
+    ) == [comment.pk for comment in reversed(comments)]
+    assert Post.objects.get().comment_count == 3
+
+
+@pytest.mark.django_db
+def test_import_enqueues_image_variants(mixer, tmp_path):
+    category = mixer.blend("blog.Category", is_published=True)
+    mixer.cycle(2).blend(
+        "blog.Post", category=category, pub_date=PAST,
+        image="posts_images/photo.jpg"
+    )
+    mixer.blend("blog.Post", category=category, pub_date=PAST, image="")
+    path = tmp_path / "dump.ndjson"
+    call_command("export_blog", "-o", str(path), stderr=io.StringIO())
+    User.objects.all().delete()
+    Category.objects.all().delete()
+    Job.objects.all().delete()
+
+    call_command("import_blog", str(path), stdout=io.StringIO())
+    jobs = Job.objects.filter(kind="post_image_variants")
+    assert sorted(job.payload["post_id"] for job in jobs) == sorted(
+        Post.objects.exclude(image="").values_list("pk", flat=True)
+    ), (
+        "Убедитесь, что после импорта для публикаций с фото без"
+        " уменьшенных копий ставятся задачи их построения."
+    )
+    assert all(
+        post.image_pending for post in Post.objects.exclude(image="")
+    )
+    transfer.finish_import(transfer.ImportStats())
+    assert jobs.count() == 2, (
+        "Убедитесь, что повторный пересчёт не ставит задачи повторно."
+    )
+
+
+@pytest.mark.django_db
+def test_failed_import_keeps_derived_data_consistent(tmp_path):
+    records = [
+        {"model": "auth.user", "pk": 1, "fields": {
+            "username": "author", "password": "", "date_joined": PAST,
+        }},
+        {"model": "blog.category", "pk": 1, "fields": {
+            "title": "Категория", "description": "", "slug": "cat",
+            "is_published": True, "created_at": PAST,
+        }},
+        {"model": "blog.post", "pk": 1, "fields": {
+            "title": "Публикация", "text": "Текст", "pub_date": PAST,
+            "author": 1, "category": 1, "is_published": True,
+            "created_at": PAST,
+        }},
+        {"model": "blog.post", "pk": 2, "fields": {"pub_date": "вчера"}},
+    ]
+    path = tmp_path / "dump.ndjson"
+    path.write_text("\n".join(
+        json.dumps(record, cls=DjangoJSONEncoder) for record in records
+    ))
+    with pytest.raises(CommandError):
+        call_command(
+            "import_blog", str(path), "--chunk-size", "3",
+            stdout=io.StringIO()
+        )
+    assert list(Post.objects.values_list("pk", flat=True)) == [1], (
+        "Убедитесь, что загруженные до ошибки части остаются в базе."
+    )
+    assert list(FeedEntry.objects.values_list("pk", flat=True)) == [1], (
+        "Убедитесь, что после ошибки импорта лента пересчитывается для"
+        " уже загруженных публикаций."
+    )
+
+
+@pytest.mark.django_db
+def test_import_resets_recounted_posts(mixer, tmp_path):
+    post = mixer.blend("blog.Post", pub_date=PAST, image="")
+    tag = post_tag(post.pk)
+    version = get_tag_versions([tag])[tag]
+    path = tmp_path / "dump.ndjson"
+    path.write_text(json.dumps({
+        "model": "blog.comment", "pk": 100, "fields": {
+            "text": "Комментарий", "post": post.pk, "author": post.author_id,
+            "created_at": PAST,
+        },
+    }, cls=DjangoJSONEncoder))
+    call_command("import_blog", str(path), stdout=io.StringIO())
+    assert Post.objects.get(pk=post.pk).comment_count == 1
+    assert get_tag_versions([tag])[tag] != version, (
+        "Убедитесь, что после импорта сбрасывается кеш публикаций,"
+        " у которых изменился счётчик комментариев."
+    )